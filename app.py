@@ -1,8 +1,17 @@
 from flask import Flask, redirect, request, render_template, session, url_for, flash, current_app, jsonify
-from models import db, User, SoundCircle, CircleMembership, Submission, SongFeedback, VibeScore, DropCred, Feedback
-from services.scoring import compute_drop_cred, snapshot_user_all_versions, SCORING_VERSION
-import spotipy
-from utils.spotify_auth import get_auth_url, get_token, get_user_profile, refresh_token_if_needed
+from models import db, User, SoundCircle, CircleMembership, Submission, SongFeedback, VibeScore, DropCred, Feedback, PlaylistJob
+from services.scoring import compute_drop_cred, compute_drop_cred_scores, snapshot_user_all_versions, drop_cred_cache_stats, SCORING_VERSION
+from services.counters import record_feedback, record_submission, invalidate_counters, rebuild_counters
+from services.snapshots import rebuild_drop_cred_history
+from services.tokens import refresh_session_token, refresh_expiring_tokens
+from services.playlist_jobs import enqueue_playlist_job, job_status
+from services.schedule import get_cycle_window as schedule_window, schedule_key, invalidate_schedule, schedule_cache_stats
+from services.cycles import current_cycle, previous_cycle, cycle_submissions, reschedule_cycles, materialize_cycles, backfill_cycles
+from services.cycle_summaries import finalize_due_cycles, cycle_results, summary_results, recent_summaries, PAST_CYCLES
+from services.playlists import sync_shared_playlist, follow_shared_playlist, leave_shared_mode
+from services.tracks import get_track_meta, remember_track, backfill_tracks, track_cache_stats, UNKNOWN_TRACK
+from utils.spotify_scheduler import get_scheduler
+from utils.spotify_auth import get_auth_url, get_token, get_user_profile, get_app_client, spotify_client
 from datetime import datetime, date, time, timedelta
 from dotenv import load_dotenv
 import random
@@ -42,97 +51,47 @@ db.init_app(app)
 migrate = Migrate(app, db)
 
 ### HELPER FUNCTIONS ######################
-# get a circle's next drop time, previous drop time, and second most previous droptime 
+# get a circle's next drop time, previous drop time, and second most previous droptime (UTC)
+# daily / weekly / biweekly (two drop days a week); see services/schedule.py
 def get_cycle_window(circle: SoundCircle) -> tuple[datetime, datetime, datetime] | None:
-    tz_est = pytz.timezone("US/Eastern")
-    tz_utc = pytz.UTC
-    
-    # Always compute “now” in EST for calendar math
-    now_est = datetime.utcnow().replace(tzinfo=tz_utc).astimezone(tz_est)
-
-    # Convert drop_time from UTC → EST (preserving intended hour like 1pm)
-    drop_time_est = circle.drop_time.astimezone(tz_est)
-    drop_time_obj = drop_time_est.time()
-
-    def local_drop_datetime_est(base_date):
-        # build timezone-aware EST datetime at the circle’s drop time
-        return tz_est.localize(datetime.combine(base_date, drop_time_obj))
-
-    if circle.drop_frequency.lower() == "daily":
-        today_drop_est = local_drop_datetime_est(now_est.date())
-
-        if now_est < today_drop_est:
-            next_drop_est = today_drop_est
-        else:
-            next_drop_est = today_drop_est + timedelta(days=1)
-
-        most_recent_drop_est = next_drop_est - timedelta(days=1)
-        second_most_recent_drop_est = next_drop_est - timedelta(days=2)
-        
-        # convert to UTC for internal use 
-        next_drop_utc = next_drop_est.astimezone(tz_utc)
-        most_recent_drop_utc = most_recent_drop_est.astimezone(tz_utc)
-        second_most_recent_utc = second_most_recent_drop_est.astimezone(tz_utc)
-
-        # return UTC for internal logic
-        return (
-            next_drop_est.astimezone(tz_utc),
-            most_recent_drop_est.astimezone(tz_utc),
-            second_most_recent_drop_est.astimezone(tz_utc),
-        )
-
-    # weekly / biweekly
-    if circle.drop_frequency.lower() == "weekly":
-        drop_days = [circle.drop_day1]
-    # elif circle.drop_frequency.lower() == "biweekly":
-    #     drop_days = [circle.drop_day1, circle.drop_day2]
-    else:
-        return None
-
-    # Generate drop datetimes around now (EST), then pick windows
-    day_names = {"Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"}
-    drop_datetimes_est = []
-    for i in range(-15, 9):
-        d = now_est.date() + timedelta(days=i)
-        if d.strftime("%A") in drop_days:
-            drop_datetimes_est.append(local_drop_datetime_est(d))
-
-    drop_datetimes_est.sort()
-
-    for i, dt_est in enumerate(drop_datetimes_est):
-        if dt_est > now_est:
-            next_drop_est = dt_est
-            mr_est = drop_datetimes_est[i-1] if i-1 >= 0 else None
-            smr_est = drop_datetimes_est[i-2] if i-2 >= 0 else None
-            if mr_est and smr_est:
-                return (
-                    next_drop_est.astimezone(tz_utc),
-                    mr_est.astimezone(tz_utc),
-                    smr_est.astimezone(tz_utc),
-                )
-            return None
-
-    # no future window found (unlikely)
-    # print("[DEBUG] Unexpected: get_cycle_window() could not determine drop window.")
-    return None
+    return schedule_window(circle)
 
 # replace drop cred scores directly in drop_creds table when calculated in dashboard route with "compute_drop_cred" call
-def upsert_current_drop_cred(user_id: int, dc: dict) -> None:
+# write-coalescing: the stored row is only touched (and committed) when the recomputed values differ,
+# so plain dashboard refreshes stay read-only against drop_creds. Returns True if a write happened.
+def upsert_current_drop_cred(user_id: int, dc: dict) -> bool:
+    score_version = dc.get("score_version", SCORING_VERSION)
+    params = dc.get("params")
+
     latest = (DropCred.query
         .filter(DropCred.user_id == user_id)
+        .filter(DropCred.circle_id.is_(None))
+        .filter(DropCred.score_version == score_version)   # never overwrite another version's row
         .filter(or_(DropCred.window_label.is_(None),
                     DropCred.window_label == 'lifetime'))
+        .filter(DropCred.window_end.is_(None))   # live row; snapshot rows (window_end set) are history
         .order_by(DropCred.computed_at.desc())
         .first())
 
     if latest:
+        unchanged = (
+            latest.total_likes == dc["total_likes"]
+            and latest.total_dislikes == dc["total_dislikes"]
+            and latest.total_possible == dc["total_possible"]
+            and latest.drop_cred_score == dc["drop_cred_score"]
+            and latest.score_version == score_version
+            and latest.params == params
+        )
+        if unchanged:
+            return False
+
         latest.total_likes     = dc["total_likes"]
         latest.total_dislikes  = dc["total_dislikes"]
         latest.total_possible  = dc["total_possible"]
         latest.drop_cred_score = dc["drop_cred_score"]
         latest.computed_at     = datetime.utcnow()
-        latest.score_version   = 1
-        latest.params          = None
+        latest.score_version   = score_version
+        latest.params          = params
     else:
         db.session.add(DropCred(
             user_id=user_id,
@@ -141,10 +100,42 @@ def upsert_current_drop_cred(user_id: int, dc: dict) -> None:
             total_possible=dc["total_possible"],
             drop_cred_score=dc["drop_cred_score"],
             computed_at=datetime.utcnow(),
-            score_version=1,
+            score_version=score_version,
+            params=params,
             window_label='lifetime',
         ))
     db.session.commit()
+    return True
+
+# latest Drop Cred per circle member: (vibedrop_username, drop_cred_score) rows
+def get_circle_leaders(circle_id: int, member_ids: list[int]) -> list:
+    if not member_ids:
+        return []
+
+    # per member: their score within this circle if one was computed (circle-partitioned engine,
+    # batch v4 for their first circle), else their cross-circle score
+    ranked = (
+        db.session.query(
+            DropCred.user_id.label('uid'),
+            DropCred.drop_cred_score.label('score'),
+            func.row_number().over(
+                partition_by=DropCred.user_id,
+                order_by=(case((DropCred.circle_id.is_(None), 1), else_=0), DropCred.computed_at.desc()),
+            ).label('rn'),
+        )
+        .filter(DropCred.user_id.in_(member_ids))
+        .filter(DropCred.score_version == SCORING_VERSION)   # ← ensure v4
+        .filter(or_(DropCred.circle_id == circle_id, DropCred.circle_id.is_(None)))
+        .filter(or_(DropCred.window_label.is_(None), DropCred.window_label == 'lifetime'))
+        .subquery()
+    )
+
+    return (
+        db.session.query(User.vibedrop_username, ranked.c.score)
+        .join(ranked, ranked.c.uid == User.id)
+        .filter(ranked.c.rn == 1)
+        .all()
+    )
 
 ### ALL ROUTES ######################
 
@@ -291,7 +282,7 @@ def dashboard():
     if 'user' not in session or 'spotify_id' not in session['user']:
         return redirect(url_for('home'))
     
-    refresh_token_if_needed(session['user'])  # Refresh token if needed
+    refresh_session_token(session['user'])  # token from the users row, refreshed ahead of expiry
 
     user = User.query.filter_by(spotify_id=session['user']['spotify_id']).first()
     if not user:
@@ -301,7 +292,7 @@ def dashboard():
 
     # compute Drop Cred for the logged-in user
     dc = compute_drop_cred(user.id)  # assumes Flask-Login's current_user
-    upsert_current_drop_cred(user.id, dc) # update drop cred score in drop_creds table for the user
+    upsert_current_drop_cred(user.id, dc) # writes drop_creds only when the score actually changed
     return render_template('dashboard.html',
                             user=user,
                             circles=sound_circles, 
@@ -383,6 +374,7 @@ def edit_circle(circle_id):
         drop_day1 = request.form.get('drop_day1')
         drop_day2 = request.form.get('drop_day2')
         drop_time_str = request.form.get('drop_time')
+        shared_playlist = request.form.get('shared_playlist') == 'on'
 
         try:
             eastern = pytz.timezone("US/Eastern")
@@ -392,12 +384,19 @@ def edit_circle(circle_id):
             flash("Invalid time format. Please use 12-hour format (e.g., 3:00 PM).", "danger")
             return redirect(url_for("edit_circle", circle_id=circle.id))
 
+        schedule_before = schedule_key(circle)
         circle.circle_name = circle_name
         circle.drop_frequency = drop_frequency
         circle.drop_day1 = drop_day1
         circle.drop_day2 = drop_day2
         circle.drop_time = drop_time
+        if schedule_key(circle) != schedule_before:
+            reschedule_cycles(circle)   # current cycle ends at the new next drop; future cycles rebuilt
+        if circle.shared_playlist and not shared_playlist:
+            leave_shared_mode(circle)
+        circle.shared_playlist = shared_playlist
         db.session.commit()
+        invalidate_schedule(circle.id)
 
         flash("Circle updated successfully!", "success")
         return redirect(url_for("circle_dashboard", circle_id=circle.id))
@@ -417,6 +416,10 @@ def delete_circle(circle_id):
         flash("Only the owner can delete this circle.", "danger")
         return redirect(url_for("circle_dashboard", circle_id=circle.id))
 
+    # submissions/feedback cascade away with the circle -> reseed affected counters
+    invalidate_counters(
+        [uid for (uid,) in db.session.query(Submission.user_id).filter_by(circle_id=circle.id).distinct()]
+    )
     db.session.delete(circle)
     db.session.commit()
     flash(f"'{circle.circle_name}' has been deleted.", "success")
@@ -485,7 +488,7 @@ def circle_dashboard(circle_id):
     user = User.query.filter_by(spotify_id=spotify_id).first()
     user_id = user.id
     
-    refresh_token_if_needed(session['user'])  # Refresh token if needed
+    refresh_session_token(session['user'])  # token from the users row, refreshed ahead of expiry
 
     # Get circle and members
     circle = SoundCircle.query.get_or_404(circle_id)
@@ -494,77 +497,54 @@ def circle_dashboard(circle_id):
 
     # ---------------- NEW: compute circle leader from drop_creds ----------------
     member_ids = [m.id for m in members] if members else []
-    
-    if member_ids:
-        subq = (
-            db.session.query(
-                DropCred.user_id.label('uid'),
-                func.max(DropCred.computed_at).label('max_at')
-            )
-            .filter(DropCred.user_id.in_(member_ids))
-            .filter(DropCred.score_version == SCORING_VERSION)   # ← ensure v4
-            # optionally keep lifetime-only:
-            # .filter((DropCred.window_label.is_(None)) | (DropCred.window_label == 'lifetime'))
-            .group_by(DropCred.user_id)
-            .subquery()
-        )
-        
-        latest = (
-            db.session.query(User.vibedrop_username, DropCred.drop_cred_score)
-            .join(DropCred, DropCred.user_id == User.id)
-            .join(subq, and_(DropCred.user_id == subq.c.uid,
-                             DropCred.computed_at == subq.c.max_at))
-            .filter(User.id.in_(member_ids))
-            .all()
-        )
+    latest = get_circle_leaders(circle_id, member_ids)
     # ---------------------------------------------------------------------------
     
-    # Get drop window (next_drop, most_recent_drop, second_most_recent_drop)
-    drop_window = get_cycle_window(circle)
-    if not drop_window:
+    # Current cycle (open for submissions) and the previous one (its songs are being rated now)
+    cycle = current_cycle(circle)
+    if cycle is None:
         return "Unable to determine drop cycle for this circle.", 400
-    next_drop, most_recent_drop, second_most_recent_drop = drop_window
+    rated_cycle = previous_cycle(circle)
     now = datetime.utcnow().replace(tzinfo=pytz.utc).astimezone(pytz.timezone("US/Eastern"))
     
-    # Get user_ids who have submitted since the most recent drop
-    recent_submissions = Submission.query.filter(
-        Submission.circle_id == circle.id,
-        Submission.submitted_at >= most_recent_drop,
-        Submission.submitted_at < next_drop
-    ).all()
-    submitted_user_ids = {sub.user_id for sub in recent_submissions}
-    
     # Initialize Spotipy client
     if 'access_token' not in session['user']:
         return redirect(url_for('home'))
-    sp = spotipy.Spotify(auth=session['user']['access_token'])
+    sp = spotify_client(session['user']['access_token'])
     
-    # Categorize submissions
-    all_submissions = Submission.query.filter_by(circle_id=circle.id).order_by(Submission.submitted_at.desc()).all()
+    # Categorize submissions: only the current and previous cycle are read (cycle_id index seek)
     enriched_submissions = []
     previous_submissions = []
     feedback_submission_ids = [] # to save submission IDs for feedback
     
     tz_utc = pytz.UTC
-    for sub in all_submissions:
+    windowed = []
+    for sub in cycle_submissions([cycle.id, rated_cycle.id if rated_cycle else None]):
         # ensure submission ts is tz-aware UTC
         ts = sub.submitted_at
         if ts.tzinfo is None:
             ts = ts.replace(tzinfo=tz_utc)  # assuming stored as UTC-naive
         else:
             ts = ts.astimezone(tz_utc)
-        
-        if ts <= second_most_recent_drop:
-            continue  # Skip songs older than 2 cycles
-        
-        try:
-            track = sp.track(sub.spotify_track_id)
-            track_name = track['name']
-            # print("Fetched track name:", track['name'])
-            artist_name = track['artists'][0]['name']
-        except Exception:
-            track_name = "Unknown Vibe"
-            artist_name = "Unknown Artist"
+        windowed.append((sub, ts))
+
+    # user_ids who have submitted since the most recent drop
+    submitted_user_ids = {sub.user_id for sub, ts in windowed if sub.cycle_id == cycle.id}
+
+    # finalized cycles are read from cycle_summaries, never re-aggregated; the cycle
+    # being rated is normally still open, so it only has a summary after a late visit
+    summaries = recent_summaries(circle.id, rated_cycle.cycle_no, PAST_CYCLES + 1) if rated_cycle else []
+    rated_summary = summaries.pop(0)[0] if summaries and summaries[0][0].cycle_id == rated_cycle.id else None
+    summaries = summaries[:PAST_CYCLES]
+
+    # track names from the tracks table; Spotify is only asked about never-seen tracks
+    track_meta = get_track_meta(sp, [sub.spotify_track_id for sub, _ in windowed] +
+                                    [h['spotify_track_id'] for s, _ in summaries for h in s.hottest or []])
+
+    for sub, ts in windowed:
+        track = track_meta.get(sub.spotify_track_id, UNKNOWN_TRACK)
+        track_name = track['name']
+        artist_name = track['artist']
 
         enriched = {
             'track_name': track_name,
@@ -575,14 +555,11 @@ def circle_dashboard(circle_id):
             'spotify_track_id': sub.spotify_track_id,
         }
 
-        # print("[DEBUG] most recent drop:", most_recent_drop, "[DEBUG] next drop:", next_drop)     ### DEBUG PRINTS FOR TIMEZONES ###
-        if most_recent_drop <= ts < next_drop:
+        if sub.cycle_id == cycle.id:
             enriched_submissions.append(enriched)
-        elif second_most_recent_drop <= ts < most_recent_drop:
+        else:
             previous_submissions.append(enriched)
             feedback_submission_ids.append(sub.id)
-        else:                                                                         ### DEBUG PRINTS FOR TIMEZONES ###
-            current_app.logger.info("→ skipped (older than 2 cycles), submission_id=%s ts=%s",sub.id, ts)
     
     # ### DEBUG PRINTS FOR TIMEZONES (may need to place this within the "for sub" loop ###
     # current_app.logger.info("Summary: current=%d previous=%d",len(enriched_submissions), len(previous_submissions))
@@ -602,81 +579,40 @@ def circle_dashboard(circle_id):
     for item in previous_submissions:
         item['user_feedback'] = feedback_map.get(item['submission_id'])
 
-    # --- Hottest drop from last finalized cycle ---
-    hottest = None
-    prev_ids = [s['submission_id'] for s in previous_submissions]
-    
-    if prev_ids:
-        likes_expr = func.sum(case((SongFeedback.feedback == 'like', 1), else_=0)).label('likes')
-        dislikes_expr = func.sum(case((SongFeedback.feedback == 'dislike', 1), else_=0)).label('dislikes')
-        net_expr = (func.coalesce(likes_expr, 0) - func.coalesce(dislikes_expr, 0)).label('net')
-
-        # get top leader
-        leader = (
-            db.session.query(  # columns to be returned
-                Submission.id.label('submission_id'),
-                Submission.spotify_track_id,
-                User.vibedrop_username.label('submitter_username'),
-                likes_expr, dislikes_expr, net_expr,                 # uses functions created above for new caluclated columns 
-            )
-            .join(User, User.id == Submission.user_id)                                   # adds submitter info 
-            .outerjoin(SongFeedback, SongFeedback.song_id == Submission.id)              # attaches feedback rows if any. Still includes if 0
-            .filter(Submission.id.in_(prev_ids))                                         # limit results to subs from previous cycle
-            .group_by(Submission.id, Submission.spotify_track_id, User.vibedrop_username)
-            .having(likes_expr > 0)                                                      # only songs with at least 1 like
-            .order_by(net_expr.desc(),likes_expr.desc(),Submission.id.asc())
-            .first()
-        )
-
-        # if tied with others, grab all others to display 
-        hottest = None # default to no leader so if leader query returns none, no users will show on the dashboard since all have 0 likes 
-        if leader:
-            top_net = leader.net
-            top_likes = leader.likes
-        
-            # 2) Fetch ALL rows that match the top net and top likes
-            hottest = (
-                db.session.query(
-                    Submission.id.label('submission_id'),
-                    Submission.spotify_track_id,
-                    User.vibedrop_username.label('submitter_username'),
-                    likes_expr, dislikes_expr, net_expr,
-                )
-                .join(User, User.id == Submission.user_id)
-                .outerjoin(SongFeedback, SongFeedback.song_id == Submission.id)
-                .filter(Submission.id.in_(prev_ids))
-                .group_by(Submission.id, Submission.spotify_track_id, User.vibedrop_username)
-                .having(likes_expr > 0)                                                      # only songs with at least 1 like (not fully necessary bc it matches to leader query)
-                .having(net_expr == top_net)
-                .having(likes_expr == top_likes)
-                .order_by(Submission.id.asc())  # stable order; no longer a tiebreaker
-                .all()
-            )
-
-        # Build a quick lookup from the already-enriched previous_submissions
-        meta_by_id = {
-            p['submission_id']: {
-                'track_name': p.get('track_name') or 'Unknown Vibe',
-                'track_artist': p.get('track_artist') or 'Unknown Artist',
-            }
-            for p in previous_submissions
+    # --- Hottest drop of the cycle being rated now (live: ratings still coming in) ---
+    # one grouped query while the cycle is open; its frozen summary once finalized
+    if rated_summary is not None:
+        results = summary_results(rated_summary)
+    elif rated_cycle is not None:
+        results = cycle_results(rated_cycle.id)
+    else:
+        results = {"hottest": [], "total_likes": 0, "total_dislikes": 0, "submissions": 0, "participants": 0}
+    meta_by_id = {p['submission_id']: p for p in previous_submissions}
+    hottest = [
+        {
+            **h,
+            'track_name': meta_by_id.get(h['submission_id'], {}).get('track_name', 'Unknown Vibe'),
+            'track_artist': meta_by_id.get(h['submission_id'], {}).get('track_artist', 'Unknown Artist'),
         }
-        
-        # Convert hottest rows to dicts and attach names
-        if hottest:
-            enriched_hottest = []
-            for row in hottest:
-                info = meta_by_id.get(row.submission_id, {})
-                enriched_hottest.append({
-                    'submission_id': row.submission_id,
-                    'spotify_track_id': row.spotify_track_id,
-                    'submitter_username': row.submitter_username,
-                    'likes': row.likes or 0,
-                    'dislikes': row.dislikes or 0,
-                    'track_name': info.get('track_name', 'Unknown Vibe'),
-                    'track_artist': info.get('track_artist', 'Unknown Artist'),
-                })
-            hottest = enriched_hottest
+        for h in results['hottest']
+    ] or None
+    results.setdefault('members', len(members))
+
+    # --- Past cycles (frozen summaries, newest first) ---
+    past_cycles = []
+    for summary, starts_at in summaries:
+        past = summary_results(summary)
+        past['cycle_no'] = summary.cycle_no
+        past['starts_at'] = starts_at
+        past['hottest'] = [
+            {
+                **h,
+                'track_name': track_meta.get(h['spotify_track_id'], UNKNOWN_TRACK)['name'],
+                'track_artist': track_meta.get(h['spotify_track_id'], UNKNOWN_TRACK)['artist'],
+            }
+            for h in past['hottest']
+        ]
+        past_cycles.append(past)
     
     return render_template(
         'circle_dashboard.html',
@@ -689,6 +625,8 @@ def circle_dashboard(circle_id):
         submitted_user_ids=submitted_user_ids,
         user_id=user_id,
         hottest=hottest, 
+        cycle_results=results,
+        past_cycles=past_cycles,
     )
 
 @app.route('/submit_feedback', methods=['POST'])
@@ -711,6 +649,9 @@ def submit_feedback():
         return redirect(request.referrer or url_for('dashboard'))
 
     submission = Submission.query.get(song_id)
+    if not submission:
+        flash("Invalid feedback submission.")
+        return redirect(request.referrer or url_for('dashboard'))
 
     # Safety: don’t allow rating own submission
     if submission and submission.user_id == user_id and not TESTING_MODE:
@@ -722,15 +663,23 @@ def submit_feedback():
         user_id=user_id, song_id=song_id
     ).first()
 
+    # keep the submitter's Drop Cred counters in step (same transaction)
+    now = datetime.utcnow()
+    record_feedback(submission.user_id,
+                    existing_feedback.feedback if existing_feedback else None,
+                    feedback_value,
+                    old_timestamp=existing_feedback.timestamp if existing_feedback else None,
+                    at=now)
+
     if existing_feedback:
         existing_feedback.feedback = feedback_value
-        existing_feedback.timestamp = datetime.utcnow()
+        existing_feedback.timestamp = now
     else:
         new_feedback = SongFeedback(
             user_id=user_id,
             song_id=song_id,
             feedback=feedback_value,
-            timestamp=datetime.utcnow()
+            timestamp=now
         )
         db.session.add(new_feedback)
 
@@ -743,7 +692,7 @@ def submit_song(circle_id):
     if 'user' not in session:
         return redirect(url_for('home'))
     
-    refresh_token_if_needed(session['user'])  # Refresh token if needed
+    refresh_session_token(session['user'])  # token from the users row, refreshed ahead of expiry
 
     circle = SoundCircle.query.get_or_404(circle_id)
     user = User.query.filter_by(spotify_id=session['user']['spotify_id']).first()
@@ -776,22 +725,28 @@ def submit_song(circle_id):
             utcnow(), most_recent_drop, next_drop
         )
 
+        cycle = current_cycle(circle)
+        if cycle is None:
+            return "⏳ Could not determine a valid drop window for this Sound Circle.", 400
+
         # Check if this user has already submitted for today's cycle
         if not TESTING_MODE:
             existing = Submission.query.filter(
-                Submission.circle_id == circle.id,
+                Submission.cycle_id == cycle.id,
                 Submission.user_id == user.id,
-                Submission.submitted_at > most_recent_drop
             ).first()
             if existing:
                 return "❌ You’ve already submitted a vibe for this cycle.", 400
 
-        # Save submission
+        # Save submission (counters first, so the distinct-cycle check doesn't see the new row)
+        record_submission(user.id, most_recent_drop.date())
+        remember_track(spotify_client(session['user']['access_token']), spotify_track_id)
         new_submission = Submission(
             circle_id=circle.id,
             user_id=user.id,
             spotify_track_id=spotify_track_id,
             cycle_date=most_recent_drop.date(),
+            cycle_id=cycle.id,
             submitted_at=utcnow(),
             visible_to_others=False
         )
@@ -810,10 +765,27 @@ def create_playlist(circle_id):
     if 'user' not in session:
         return redirect(url_for('home'))
     
-    refresh_token_if_needed(session['user'])  # Refresh token if needed
+    refresh_session_token(session['user'])  # token from the users row, refreshed ahead of expiry
     user = User.query.filter_by(spotify_id=session['user']['spotify_id']).first()
     circle = SoundCircle.query.get_or_404(circle_id)
 
+    # Shared mode: the circle's one playlist is filled at cycle close (sync-shared-playlists); members just follow it
+    if circle.shared_playlist:
+        try:
+            shared = follow_shared_playlist(spotify_client(session['user']['access_token']), user, circle)
+        except Exception as e:
+            current_app.logger.warning("Following shared playlist for circle %s failed: %s", circle.id, e)
+            return jsonify({"error": "Failed to open the circle playlist. Try logging out and back in."}), 500
+        if shared is None:
+            return jsonify({"error": "The circle playlist is filled when a cycle closes. Check back after the next drop."}), 409
+        return jsonify({
+            "status": "done",
+            "playlist_id": shared["playlist_id"],
+            "playlist_uri": f"spotify://playlist/{shared['playlist_id']}",
+            "playlist_url": shared["playlist_url"],
+            "message": "✅ Opening the circle playlist!",
+        })
+
     # Get drop window using new logic
     # print("circle drop time right before window calculation:", circle.drop_time)
     drop_window = get_cycle_window(circle)
@@ -827,16 +799,12 @@ def create_playlist(circle_id):
         drop_window[2].astimezone(pytz.utc),
     )
 
-    # Get submissions from previous cycle
-    previous_submissions = [
-        sub for sub in Submission.query.filter_by(circle_id=circle.id).all()
-        if sub.submitted_at.replace(tzinfo=pytz.utc) > second_most_recent_drop
-        and sub.submitted_at.replace(tzinfo=pytz.utc) <= most_recent_drop
-    ]
-    
-    all_subs = Submission.query.filter_by(circle_id=circle.id).all()
-    # for sub in all_subs:
-    #     print("submitted_at =", sub.submitted_at.isoformat())
+    # Get submissions from previous cycle (id + track only)
+    rated_cycle = previous_cycle(circle)
+    previous_submissions = cycle_submissions(
+        [rated_cycle.id if rated_cycle else None],
+        Submission.id, Submission.spotify_track_id,
+    )
     # print("next_drop:", next_drop)
     # print("previous_submissions", previous_submissions)
     # print("Second most recent drop:", second_most_recent_drop.isoformat())
@@ -844,9 +812,6 @@ def create_playlist(circle_id):
     if not previous_submissions:
         return jsonify({"error": "No submissions found for the previous cycle."}), 400
 
-    # Spotify auth
-    sp = spotipy.Spotify(auth=session['user']['access_token'])
-
     ########## old code for trying to create a new playlist when it always made a new playlist ###########
     # # Create playlist
     # today_str = most_recent_drop.strftime('%b %d, %Y')
@@ -871,79 +836,28 @@ def create_playlist(circle_id):
     #     })
     ########## old code for trying to create a new playlist when it always made a new playlist ###########
 
-    # Use a stable playlist name per circle so we can re-use it
-    base_name = f"VibeDrop - {circle.circle_name}"
+    # Stable playlist per (user, circle); the Spotify work runs as a queued job off the request path
     today_str = most_recent_drop.strftime('%b %d, %Y')
     description = f"Vibes from the {circle.circle_name} Sound Circle — updated {today_str}"
 
-    try:
-        # 1) Find existing playlist by name (paginate through playlists)
-        playlist = None
-        page = sp.current_user_playlists(limit=50)
-        while page:
-            for p in page.get("items", []):
-                if p.get("name") == base_name:
-                    playlist = p
-                    break
-            if playlist or not page.get("next"):
-                break
-            page = sp.next(page)
-
-        created = False
-        if not playlist:
-            playlist = sp.user_playlist_create(
-                user=session['user']['id'],
-                name=base_name,
-                public=False,
-                description=description
-            )
-            created = True
-
-        playlist_id = playlist["id"]
-
-        # 2) Build track uris from previous cycle
-        track_uris = [
-            f"spotify:track:{sub.spotify_track_id}"
-            for sub in previous_submissions
-            if sub.spotify_track_id
-        ]
-
-        # 3) Optional: skip tracks already in the playlist (prevents duplicates)
-        existing_ids = set()
-        items_page = sp.playlist_items(
-            playlist_id,
-            fields="items(track(id)),next",
-            limit=100
-        )
-        while items_page:
-            for it in items_page.get("items", []):
-                t = (it.get("track") or {})
-                tid = t.get("id")
-                if tid:
-                    existing_ids.add(tid)
-            if not items_page.get("next"):
-                break
-            items_page = sp.next(items_page)
-
-        new_uris = [u for u in track_uris if u.split(":")[-1] not in existing_ids]
-
-        # Spotify add-items limit is 100 per call
-        for i in range(0, len(new_uris), 100):
-            sp.playlist_add_items(playlist_id=playlist_id, items=new_uris[i:i+100])
-
-        return jsonify({
-            "playlist_id": playlist_id,
-            "playlist_uri": f"spotify://playlist/{playlist_id}",
-            "playlist_url": playlist["external_urls"]["spotify"],
-            "message": (
-                f"✅ Playlist created and filled!"
-                if created else
-                f"✅ Added {len(new_uris)} new vibe(s) to your existing playlist!"
-            )
-        })
+    job = enqueue_playlist_job(
+        user, circle,
+        [(sub.id, sub.spotify_track_id) for sub in previous_submissions],
+        description,
+    )
+    status_url = url_for('playlist_job_status', job_id=job.id)
+    return jsonify({**job_status(job), "status_url": status_url}), 202, {"Location": status_url}
 
-    except Exception as e:
-        return jsonify({"error": "Failed to create/update playlist. Try logging out and back in."}), 500
+# poll target for the dashboard's "Create & Open Playlist" button
+@app.route('/playlist-jobs/<int:job_id>', methods=['GET'])
+def playlist_job_status(job_id):
+    if 'user' not in session:
+        return jsonify({"error": "Not logged in."}), 401
+    user = User.query.filter_by(spotify_id=session['user']['spotify_id']).first()
+    job = PlaylistJob.query.get_or_404(job_id)
+    if user is None or job.user_id != user.id:
+        return jsonify({"error": "Not found."}), 404
+    return jsonify(job_status(job))
 
 # route to the all users page 
 @app.route('/all-users', methods=['GET'])
@@ -975,6 +889,9 @@ def all_users():
             DropCred.user_id.label("u_id"),
             func.max(DropCred.computed_at).label("max_ts"),
         )
+        .filter(DropCred.circle_id.is_(None))   # cross-circle scores only
+        .filter(DropCred.score_version == SCORING_VERSION)
+        .filter(or_(DropCred.window_label.is_(None), DropCred.window_label == 'lifetime'))   # one row per snapshot
         .group_by(DropCred.user_id)
         .subquery()
     )
@@ -991,6 +908,9 @@ def all_users():
             and_(
                 DropCred.user_id == dc_max.c.u_id,
                 DropCred.computed_at == dc_max.c.max_ts,
+                DropCred.circle_id.is_(None),
+                DropCred.score_version == SCORING_VERSION,
+                or_(DropCred.window_label.is_(None), DropCred.window_label == 'lifetime'),
             ),
         )
         .subquery()
@@ -1066,6 +986,20 @@ def debug_drop_window(circle_id):
     ), 200, {'Content-Type': 'text/plain; charset=utf-8'}
 
 
+# per-worker cache counters (hit/miss/eviction) for sizing
+@app.route('/debug/cache-stats')
+def debug_cache_stats():
+    if not TESTING_MODE or 'user' not in session:
+        return "❌ Disabled outside TESTING_MODE.", 403
+    return jsonify({
+        "pid": os.getpid(),
+        "drop_cred": drop_cred_cache_stats(),
+        "tracks": track_cache_stats(),
+        "schedule": schedule_cache_stats(),
+        "spotify_scheduler": get_scheduler().snapshot(),
+    })
+
+
 @app.route('/dev/wipe_self', methods=['GET', 'POST'])
 def dev_wipe_self():
     if not app.debug:
@@ -1091,6 +1025,22 @@ def dev_wipe_self():
 
     # --- deletion logic (same as before) ---
     user_id = user.id
+
+    # anyone whose songs this user rated, or who submitted to circles being removed, gets reseeded
+    affected_ids = [uid for (uid,) in (
+        db.session.query(Submission.user_id)
+        .join(SongFeedback, SongFeedback.song_id == Submission.id)
+        .filter(SongFeedback.user_id == user_id)
+        .distinct()
+    )]
+    affected_ids += [uid for (uid,) in (
+        db.session.query(Submission.user_id)
+        .join(SoundCircle, SoundCircle.id == Submission.circle_id)
+        .filter(SoundCircle.creator_id == user_id)
+        .distinct()
+    )]
+    invalidate_counters(affected_ids)
+
     circles = SoundCircle.query.filter_by(creator_id=user_id).all()
     circle_ids = [c.id for c in circles]
     if circle_ids:
@@ -1245,6 +1195,45 @@ def send_email_reminders():
     print(f"✅ Done. {reminder_count} reminder(s) sent. {skipped_circles} circle(s) skipped.")
     return "✅ Reminder emails processed"
 
+# push each closed cycle into its circle's shared playlist (circles in shared mode only, once per cycle)
+def sync_shared_circle_playlists() -> tuple[int, int]:
+    synced = failed = 0
+    circles = (SoundCircle.query
+               .filter(SoundCircle.shared_playlist.is_(True))
+               .filter(SoundCircle.creator_id.isnot(None))
+               .all())
+    for circle in circles:
+        drop_window = get_cycle_window(circle)
+        if not drop_window:
+            continue
+        most_recent_drop = drop_window[1]
+        synced_through = circle.shared_synced_through
+        if synced_through is not None and synced_through.tzinfo is None:
+            synced_through = pytz.utc.localize(synced_through)   # SQLite hands back naive UTC
+        if synced_through is not None and synced_through >= most_recent_drop:
+            continue   # this cycle is already in the playlist
+
+        current_cycle(circle)   # materializes the circle's cycles if it has none yet
+        closed = previous_cycle(circle)
+        if closed is None:
+            continue
+        cycle_subs = cycle_submissions([closed.id], Submission.id, Submission.spotify_track_id)[::-1]   # oldest first
+        description = f"Vibes from the {circle.circle_name} Sound Circle — updated {most_recent_drop.strftime('%b %d, %Y')}"
+        try:
+            if sync_shared_playlist(circle, [(sid, tid) for sid, tid in cycle_subs], most_recent_drop, description):
+                synced += 1
+        except Exception as e:
+            failed += 1
+            current_app.logger.warning("Shared playlist sync failed for circle %s: %s", circle.id, e)
+    return synced, failed
+
+# cron target (like /send-email-reminders): run shortly after drop times
+@app.route('/sync-shared-playlists')
+def sync_shared_playlists():
+    synced, failed = sync_shared_circle_playlists()
+    print(f"✅ Shared playlists: {synced} synced, {failed} failed.")
+    return "✅ Shared playlists processed"
+
 # route for feedback submission
 @app.route('/feedback', methods=['GET', 'POST'])
 def feedback():
@@ -1276,6 +1265,66 @@ def admin_snapshot(user_id):
     snapshot_user_all_versions(user_id, versions=(1,2,3,4), replace=True, commit=True)
     return f"Snapshotted user {user_id}", 200
 
+# flask CLI: reseed every user's Drop Cred counters from history (run once after the migration)
+@app.cli.command("rebuild-drop-cred-counters")
+def rebuild_drop_cred_counters_cmd():
+    n = rebuild_counters()
+    click.echo(f"Rebuilt Drop Cred counters for {n} user(s).")
+
+# flask CLI: rebuild lifetime / 90d / per-cycle DropCred history for every user and version in one pass
+@app.cli.command("rebuild-drop-cred-history")
+@click.option("--version", "versions", type=int, multiple=True, help="Score version(s); default all registered.")
+@click.option("--window", "windows", multiple=True, help="lifetime, <N>d or cycle; default lifetime/90d/cycle.")
+def rebuild_drop_cred_history_cmd(versions, windows):
+    n = rebuild_drop_cred_history(versions=versions or None, windows=windows or ("lifetime", "90d", "cycle"))
+    click.echo(f"Wrote {n} DropCred snapshot row(s).")
+
+# flask CLI: recompute Drop Cred for every user (optionally per circle, across worker processes)
+@app.cli.command("recompute-drop-cred")
+@click.option("--per-circle", is_flag=True, help="Score each circle separately, plus a cross-circle score.")
+@click.option("--workers", type=int, default=None, help="Worker processes for --per-circle (default: CPU count).")
+def recompute_drop_cred_cmd(per_circle, workers):
+    compute_drop_cred_scores(per_circle=per_circle, workers=workers)
+    click.echo("Drop Cred recomputed.")
+
+# flask CLI (cron every ~10 min): refresh Spotify tokens before they expire so requests and jobs never wait on one
+@app.cli.command("refresh-spotify-tokens")
+@click.option("--within-minutes", type=int, default=15, help="Refresh tokens expiring within this many minutes.")
+def refresh_spotify_tokens_cmd(within_minutes):
+    refreshed, failed = refresh_expiring_tokens(timedelta(minutes=within_minutes))
+    click.echo(f"Refreshed {refreshed} token(s); {failed} failed.")
+
+# flask CLI: fill the tracks table for every submitted song it doesn't know yet (50 ids per Spotify call)
+@app.cli.command("backfill-tracks")
+def backfill_tracks_cmd():
+    stored, unresolved = backfill_tracks(get_app_client())
+    click.echo(f"Stored {stored} track(s); {unresolved} could not be resolved.")
+
+# flask CLI (cron after drop times): fill each shared circle playlist with the cycle that just closed
+@app.cli.command("sync-shared-playlists")
+def sync_shared_playlists_cmd():
+    synced, failed = sync_shared_circle_playlists()
+    click.echo(f"Synced {synced} shared playlist(s); {failed} failed.")
+
+# flask CLI (cron, daily): keep every circle's cycles materialized a few drops ahead
+@app.cli.command("materialize-cycles")
+def materialize_cycles_cmd():
+    n = materialize_cycles()
+    click.echo(f"Materialized {n} cycle(s).")
+
+# flask CLI: build each circle's cycle history and set cycle_id on existing submissions (run once after the migration)
+@app.cli.command("backfill-cycles")
+def backfill_cycles_cmd():
+    cycles, assigned = backfill_cycles()
+    click.echo(f"Materialized {cycles} cycle(s); assigned {assigned} submission(s).")
+
+# flask CLI (cron, after drop times): freeze results of cycles whose rating window has closed
+@app.cli.command("finalize-cycles")
+@click.option("--grace-minutes", type=int, default=60, help="Late ratings accepted this long after the rating cycle ends.")
+def finalize_cycles_cmd(grace_minutes):
+    n = finalize_due_cycles(timedelta(minutes=grace_minutes))
+    click.echo(f"Finalized {n} cycle(s).")
+
 ### FOOTER LINKS IN BASE.HTML ###
 @app.route("/privacy")
 def privacy():
@@ -0,0 +1,268 @@
+# benchmarks/scoring_bench.py
+#
+# Scoring hot-path benchmark on synthetic circles.
+#
+#   python benchmarks/scoring_bench.py                          # 1e2 + 1e4 feedback rows, temp SQLite
+#   python benchmarks/scoring_bench.py --sizes 100,10000,1000000
+#   python benchmarks/scoring_bench.py --database-url postgresql://localhost/vibedrop_bench
+#
+# Every (size, entry point) pair emits one JSON line (stdout, or --output FILE):
+#   {"size": 10000, "entry": "score_v4", "seconds_median": ..., "seconds_min": ...,
+#    "statements": 6, "repeat": 3, ...}
+# so runs can be diffed / charted. TESTING_MODE chatter goes to stderr. The target database is DROPPED and recreated:
+# never point this at a real one.
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+INSERT_BATCH = 10000
+
+
+# --- Synthetic data ----------------------------------------------------------
+def shape_for(feedback_rows: int, circle_size: int, ratings_per_song: int) -> dict:
+    """Pick user / circle / submission counts that produce ~feedback_rows ratings."""
+    submissions = max(1, feedback_rows // ratings_per_song)
+    users = max(circle_size, int(submissions ** 0.5) * 2)
+    circles = max(1, users // circle_size)
+    return {"users": users, "circles": circles, "submissions": submissions, "feedback": feedback_rows}
+
+
+def generate(db, models, shape: dict, circle_size: int, seed: int = 7) -> dict:
+    """Bulk-insert synthetic users, circles, memberships, submissions and feedback."""
+    from sqlalchemy import insert
+
+    rng = random.Random(seed)
+    User, SoundCircle, CircleMembership, Submission, SongFeedback = (
+        models.User, models.SoundCircle, models.CircleMembership, models.Submission, models.SongFeedback,
+    )
+
+    def bulk(model, rows):
+        for i in range(0, len(rows), INSERT_BATCH):
+            db.session.execute(insert(model), rows[i:i + INSERT_BATCH])
+
+    now = datetime.utcnow()
+    n_users, n_circles = shape["users"], shape["circles"]
+    bulk(User, [
+        {"id": i, "spotify_id": f"bench_{i}", "vibedrop_username": f"bench_{i}",
+         "access_token": "bench", "created_at": now}
+        for i in range(1, n_users + 1)
+    ])
+    bulk(SoundCircle, [
+        {"id": c, "circle_name": f"bench circle {c}", "drop_frequency": "weekly",
+         "drop_day1": rng.choice(DAYS), "drop_time": datetime(2025, 1, 1, 18, 0),
+         "invite_code": f"b{c:09d}"[:10], "creator_id": ((c - 1) * circle_size) % n_users + 1, "created_at": now}
+        for c in range(1, n_circles + 1)
+    ])
+
+    # members: contiguous blocks, plus a few users in a second circle
+    members = {c: [((c - 1) * circle_size + k) % n_users + 1 for k in range(circle_size)]
+               for c in range(1, n_circles + 1)}
+    if n_circles > 1:
+        for c in range(1, n_circles + 1):
+            extra = rng.randint(1, n_users)
+            if extra not in members[c]:
+                members[c].append(extra)
+    bulk(CircleMembership, [
+        {"user_id": u, "circle_id": c, "joined_at": now} for c, us in members.items() for u in us
+    ])
+
+    # submissions spread over ~a year of weekly cycles
+    first_cycle = date.today() - timedelta(weeks=52)
+    subs = []
+    for sid in range(1, shape["submissions"] + 1):
+        c = rng.randint(1, n_circles)
+        cycle = first_cycle + timedelta(weeks=rng.randint(0, 51))
+        subs.append({
+            "id": sid, "circle_id": c, "user_id": rng.choice(members[c]),
+            "spotify_track_id": f"track{sid:08d}", "cycle_date": cycle,
+            "submitted_at": datetime.combine(cycle, datetime.min.time()) + timedelta(hours=rng.randint(0, 100)),
+            "visible_to_others": False,
+        })
+    bulk(Submission, subs)
+
+    # feedback: other circle members rate each song (unique per (user, song))
+    feedback, fid = [], 1
+    per_song = max(1, shape["feedback"] // max(1, len(subs)))
+    for sub in subs:
+        raters = [u for u in members[sub["circle_id"]] if u != sub["user_id"]]
+        for u in rng.sample(raters, min(per_song, len(raters))):
+            feedback.append({
+                "id": fid, "user_id": u, "song_id": sub["id"],
+                "feedback": "like" if rng.random() < 0.65 else "dislike",
+                "timestamp": sub["submitted_at"] + timedelta(hours=rng.randint(1, 160)),
+            })
+            fid += 1
+            if len(feedback) >= INSERT_BATCH:
+                bulk(SongFeedback, feedback)
+                feedback = []
+    bulk(SongFeedback, feedback)
+    db.session.commit()
+
+    return {**shape, "feedback": fid - 1, "memberships": sum(len(v) for v in members.values())}
+
+
+# --- Measurement -------------------------------------------------------------
+class StatementCounter:
+    """Counts cursor executions on an engine (an executemany counts once)."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def measure(fn, counter: StatementCounter, repeat: int, setup=None) -> dict:
+    timings, statements = [], []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        counter.count = 0
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+        statements.append(counter.count)
+    return {
+        "seconds_median": round(statistics.median(timings), 6),
+        "seconds_min": round(min(timings), 6),
+        "statements": max(statements),
+        "statements_min": min(statements),   # warm repeat (caches populated)
+        "repeat": repeat,
+    }
+
+
+def entry_points(db, models, appmod, sample_users: list[int], sample_circle: int, workers: int) -> dict:
+    """name -> (callable, setup-or-None) for every scoring path worth tracking."""
+    import services.scoring as scoring
+    from services.circle_scoring import score_v4_per_circle
+    from services.counters import rebuild_counters
+    from services.history import load_history, CumulativeIndex, scores_as_of
+    from services.backtest import param_grid, sweep
+    from services.snapshots import rebuild_drop_cred_history
+
+    member_ids = [m.user_id for m in models.CircleMembership.query.filter_by(circle_id=sample_circle)]
+
+    def single_cold():
+        # counters + cache empty: the first-view seed path
+        for uid in sample_users:
+            scoring._compute_drop_cred_v4_single(uid)
+
+    def reset_single():
+        models.DropCredCounter.query.filter(models.DropCredCounter.user_id.in_(sample_users)).delete(
+            synchronize_session=False)
+        db.session.commit()
+        scoring._score_cache.clear()
+
+    def single_warm():
+        for uid in sample_users:
+            scoring._compute_drop_cred_v4_single(uid)
+
+    def cached():
+        for uid in sample_users:
+            scoring.compute_drop_cred(uid)
+
+    def leaders():
+        appmod.get_circle_leaders(sample_circle, member_ids)
+
+    def backtest_sweep():
+        hist = load_history()
+        sweep(hist, param_grid(alpha=range(1, 11), mu=[0.5, 0.6, 0.7, 0.8, 0.9], beta=range(20)), workers=1)
+
+    def as_of_all():
+        scores_as_of(datetime.utcnow(), "90d", index=CumulativeIndex(load_history()))
+
+    return {
+        "score_v4": (scoring.score_v4, None),
+        "score_v4_per_circle": (lambda: score_v4_per_circle(workers=workers), None),
+        "score_v5": (scoring.score_v5, None),
+        f"compute_drop_cred_v4_single_cold_x{len(sample_users)}": (single_cold, reset_single),
+        f"compute_drop_cred_v4_single_warm_x{len(sample_users)}": (single_warm, None),
+        f"compute_drop_cred_cached_x{len(sample_users)}": (cached, None),
+        "circle_leader_query": (leaders, None),
+        "rebuild_counters": (rebuild_counters, None),
+        "rebuild_drop_cred_history": (rebuild_drop_cred_history, None),
+        "backtest_sweep_1000": (backtest_sweep, None),
+        "scores_as_of_90d_all_users": (as_of_all, None),
+    }
+
+
+# --- Driver ------------------------------------------------------------------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="VibeDrop scoring benchmark (JSON lines on stdout).")
+    parser.add_argument("--sizes", default="100,10000",
+                        help="comma-separated feedback row counts, e.g. 100,10000,1000000")
+    parser.add_argument("--database-url", default=None,
+                        help="target DB (dropped and recreated!); default: a temp SQLite file")
+    parser.add_argument("--circle-size", type=int, default=12)
+    parser.add_argument("--ratings-per-song", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sample-users", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--only", default=None, help="comma-separated entry point names to run")
+    parser.add_argument("--output", default=None, help="append JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = [int(float(s)) for s in args.sizes.split(",") if s.strip()]
+    only = set(args.only.split(",")) if args.only else None
+    tmpdir = tempfile.mkdtemp(prefix="vibedrop_bench_")
+
+    # app.py reads DATABASE_URL at import time; each size reuses the same (recreated) database
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    import app as appmod
+    import models
+
+    out = open(args.output, "a") if args.output else sys.stdout
+
+    def emit(record: dict) -> None:
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    db = models.db
+    for size in sizes:
+        with appmod.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            t0 = time.perf_counter()
+            shape = generate(db, models, shape_for(size, args.circle_size, args.ratings_per_song), args.circle_size)
+            emit({"size": size, "entry": "_generate", "seconds": round(time.perf_counter() - t0, 3),
+                  "dialect": db.engine.dialect.name, **shape})
+
+            counter = StatementCounter(db.engine)
+            rng = random.Random(size)
+            sample_users = rng.sample(range(1, shape["users"] + 1), min(args.sample_users, shape["users"]))
+            sample_circle = rng.randint(1, shape["circles"])
+
+            for name, (fn, setup) in entry_points(db, models, appmod, sample_users, sample_circle,
+                                                  args.workers).items():
+                if only and name not in only:
+                    continue
+                with contextlib.redirect_stdout(sys.stderr):
+                    result = measure(fn, counter, args.repeat, setup=setup)
+                db.session.rollback()
+                emit({"size": size, "entry": name, "dialect": db.engine.dialect.name, **result})
+
+            db.session.remove()
+
+    if out is not sys.stdout:
+        out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -61,6 +61,8 @@ class SoundCircle(db.Model):
     creator_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True) #* added ondelete='SET NULL' and changed nullable to True *#
     creator = db.relationship('User', backref='created_circles')
     created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    shared_playlist = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # one collaborative playlist (creator's account) instead of one per member
+    shared_synced_through = db.Column(DateTime(timezone=True), nullable=True)  # close of the last cycle pushed to the shared playlist
     circle_memberships = db.relationship('CircleMembership', back_populates='circle', 
                                         cascade='all, delete-orphan', passive_deletes=True) #* added cascade and passive_deletes *#
     submissions = db.relationship('Submission', back_populates='circle', cascade='all, delete-orphan', #* changed form backref to back_populates *#
@@ -105,9 +107,15 @@ class Submission(db.Model):
     cycle_date = db.Column(db.Date, nullable=False)
     submitted_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow)
     visible_to_others = db.Column(db.Boolean, default=False)
+    cycle_id = db.Column(db.Integer, db.ForeignKey('cycles.id', ondelete='SET NULL'), nullable=True, index=True)  # cycle it was submitted in (set at insert)
 
     circle = db.relationship('SoundCircle', back_populates='submissions') #* added this whole line *#
     user = db.relationship('User', backref='submissions')
+    cycle = db.relationship('Cycle')
+
+    __table_args__ = (
+        db.Index('ix_submissions_circle_submitted_at', 'circle_id', 'submitted_at'),   # drop-window reads
+    )
     
 # Stores all likes/dislikes on submissions
 class SongFeedback(db.Model):
@@ -153,19 +161,161 @@ class DropCred(db.Model):
 
     # Versioning + parameters used to compute the score (for Phase 2/3 evolution)
     score_version = db.Column(db.SmallInteger, nullable=False, default=1)  # 1 = MVP
-    params = db.Column(JSONB, nullable=True)
+    params = db.Column(db.JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # JSONB on Postgres, JSON elsewhere (local SQLite)
 
     # Optional explicit window if you snapshot rolling periods (kept nullable for MVP)
     window_label = db.Column(db.String(32), nullable=True)  # e.g., "lifetime", "90d", "cycle_2025wk33"
     window_start = db.Column(DateTime(timezone=True), nullable=True)
     window_end = db.Column(DateTime(timezone=True), nullable=True)
 
+    # NULL = cross-circle score (what the dashboard shows); set = score within that circle only
+    circle_id = db.Column(db.Integer, db.ForeignKey("sound_circles.id", ondelete="CASCADE"), nullable=True)
+
     user = db.relationship("User", back_populates="drop_cred_history") #* changed backref to back_populates, also removed lazy="dynamic" *#
 
     __table_args__ = (
         db.Index("ix_drop_creds_user_computed_at", "user_id", "computed_at"),
+        db.Index("ix_drop_creds_circle_user", "circle_id", "user_id"),
+    )
+
+# running per-user Drop Cred inputs, kept current by the feedback/submission write paths
+class DropCredCounter(db.Model):
+    __tablename__ = "drop_cred_counters"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    ratings_received = db.Column(db.Integer, nullable=False, default=0)
+    cycles_submitted = db.Column(db.Integer, nullable=False, default=0)  # distinct Submission.cycle_date
+    updated_at = db.Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    # v5: exponentially decayed likes/ratings as of decayed_at (roll forward with exp(-rate * dt))
+    decayed_likes = db.Column(db.Float, nullable=False, default=0.0)
+    decayed_ratings = db.Column(db.Float, nullable=False, default=0.0)
+    decayed_at = db.Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return (f"<DropCredCounter user_id={self.user_id} likes={self.likes_received} "
+                f"ratings={self.ratings_received} cycles={self.cycles_submitted}>")
+
+# Spotify track metadata, filled when a song is submitted so pages never re-fetch it
+class Track(db.Model):
+    __tablename__ = "tracks"
+
+    spotify_track_id = db.Column(db.String(100), primary_key=True)
+    name = db.Column(db.String(512), nullable=False)
+    artist = db.Column(db.String(512), nullable=True)           # primary (first) artist
+    album_art_url = db.Column(db.String(512), nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+    fetched_at = db.Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    def __repr__(self):
+        return f"<Track {self.spotify_track_id} {self.name!r}>"
+
+# the "VibeDrop - <circle>" playlist each user's syncs go to, so it's found without scanning their library
+class CirclePlaylist(db.Model):
+    __tablename__ = "circle_playlists"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    circle_id = db.Column(db.Integer, db.ForeignKey("sound_circles.id", ondelete="CASCADE"), nullable=False)
+    spotify_playlist_id = db.Column(db.String(64), nullable=False)
+    playlist_url = db.Column(db.String(512), nullable=True)
+    created_at = db.Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    verified_at = db.Column(DateTime(timezone=True), nullable=True)   # last time Spotify confirmed the user still follows it
+    snapshot_id = db.Column(db.String(128), nullable=True)            # Spotify snapshot after our last write
+
+    items = db.relationship("CirclePlaylistItem", back_populates="playlist",
+                            cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "circle_id", name="uq_circle_playlists__user_id_circle_id"),
+    )
+
+    def __repr__(self):
+        return f"<CirclePlaylist user_id={self.user_id} circle_id={self.circle_id} {self.spotify_playlist_id}>"
+
+# submissions already pushed to a circle playlist, so a sync only adds the delta
+class CirclePlaylistItem(db.Model):
+    __tablename__ = "circle_playlist_items"
+
+    id = db.Column(db.Integer, primary_key=True)
+    circle_playlist_id = db.Column(db.Integer, db.ForeignKey("circle_playlists.id", ondelete="CASCADE"), nullable=False)
+    submission_id = db.Column(db.Integer, db.ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False)
+    spotify_track_id = db.Column(db.String(100), nullable=False)
+    added_at = db.Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    playlist = db.relationship("CirclePlaylist", back_populates="items")
+
+    __table_args__ = (
+        db.UniqueConstraint("circle_playlist_id", "submission_id",
+                            name="uq_circle_playlist_items__circle_playlist_id_submission_id"),
+    )
+
+# queued "create & open playlist" requests; the route returns the id, a worker thread does the Spotify calls
+class PlaylistJob(db.Model):
+    __tablename__ = "playlist_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    circle_id = db.Column(db.Integer, db.ForeignKey("sound_circles.id", ondelete="CASCADE"), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default="queued")   # queued | running | done | failed
+    result = db.Column(db.JSON().with_variant(JSONB(), "postgresql"), nullable=True)   # playlist id/url/message when done
+    error = db.Column(db.String(512), nullable=True)
+    retry_after = db.Column(db.Integer, nullable=True)   # seconds, when failed on a Spotify rate limit
+    created_at = db.Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    started_at = db.Column(DateTime(timezone=True), nullable=True)
+    finished_at = db.Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_playlist_jobs_user_circle_status", "user_id", "circle_id", "status"),
     )
 
+    def __repr__(self):
+        return f"<PlaylistJob {self.id} user_id={self.user_id} circle_id={self.circle_id} {self.status}>"
+
+# a circle's drop cycles, materialized ahead of time: [starts_at, ends_at) runs from one drop to the next
+class Cycle(db.Model):
+    __tablename__ = "cycles"
+
+    id = db.Column(db.Integer, primary_key=True)
+    circle_id = db.Column(db.Integer, db.ForeignKey("sound_circles.id", ondelete="CASCADE"), nullable=False)
+    cycle_no = db.Column(db.Integer, nullable=False)   # 1, 2, 3... per circle
+    starts_at = db.Column(DateTime(timezone=True), nullable=False)   # the drop that opens it
+    ends_at = db.Column(DateTime(timezone=True), nullable=False)     # the next drop
+
+    __table_args__ = (
+        db.UniqueConstraint("circle_id", "cycle_no", name="uq_cycles__circle_id_cycle_no"),
+        db.UniqueConstraint("circle_id", "starts_at", name="uq_cycles__circle_id_starts_at"),
+    )
+
+    def __repr__(self):
+        return f"<Cycle circle_id={self.circle_id} #{self.cycle_no} {self.starts_at}>"
+
+# frozen results of a cycle whose rating window has closed (written once by `flask finalize-cycles`)
+class CycleSummary(db.Model):
+    __tablename__ = "cycle_summaries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    cycle_id = db.Column(db.Integer, db.ForeignKey("cycles.id", ondelete="CASCADE"), nullable=False)
+    circle_id = db.Column(db.Integer, db.ForeignKey("sound_circles.id", ondelete="CASCADE"), nullable=False)
+    cycle_no = db.Column(db.Integer, nullable=False)
+    hottest = db.Column(db.JSON().with_variant(JSONB(), "postgresql"), nullable=False, default=list)   # top net score (ties kept), likes > 0
+    total_likes = db.Column(db.Integer, nullable=False, default=0)
+    total_dislikes = db.Column(db.Integer, nullable=False, default=0)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+    participants = db.Column(db.Integer, nullable=False, default=0)   # distinct submitters
+    raters = db.Column(db.Integer, nullable=False, default=0)         # distinct members who rated its songs
+    members = db.Column(db.Integer, nullable=False, default=0)        # circle size when finalized
+    finalized_at = db.Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("cycle_id", name="uq_cycle_summaries__cycle_id"),
+        db.Index("ix_cycle_summaries_circle_cycle_no", "circle_id", "cycle_no"),
+    )
+
+    def __repr__(self):
+        return f"<CycleSummary circle_id={self.circle_id} #{self.cycle_no}>"
+
 # feedback table
 class Feedback(db.Model):
     __tablename__ = 'feedback'
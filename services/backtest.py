@@ -0,0 +1,160 @@
+# services/backtest.py
+#
+# Offline Drop Cred tuning: load history once, score every user under many
+# parameter settings at once, and compare the resulting leaderboards.
+#
+#   from services.history import load_history
+#   from services.backtest import param_grid, backtest
+#   hist = load_history()                      # inside an app context
+#   grid = param_grid(alpha=range(1, 11), mu=[0.5, 0.6, 0.7, 0.8], beta=[0, 1, 2, 3, 4])
+#   report = backtest(hist, grid, version=4)
+
+import itertools
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from services.scoring import score_formulas, decay_half_life
+
+
+# --- Grids -------------------------------------------------------------------
+def param_grid(**axes) -> list[dict]:
+    """Cartesian product of parameter axes -> list of param dicts."""
+    names = list(axes)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(list(axes[n]) for n in names))]
+
+
+def _grid_columns(grid: list[dict]) -> dict:
+    # {"alpha": (G, 1) array, ...} so params broadcast against (U,) user totals
+    return {name: np.array([p[name] for p in grid], dtype=float)[:, None] for name in grid[0]}
+
+
+# --- Evaluation --------------------------------------------------------------
+def _evaluate_chunk(version: int, inputs: dict, grid: list[dict]) -> np.ndarray:
+    # module-level so ProcessPoolExecutor can pickle it
+    formula, defaults = score_formulas[version]
+    params = dict(defaults)
+    params.update(_grid_columns(grid))
+    scores = formula(inputs["likes"], inputs["ratings"], inputs["cycles"], **params)
+    return np.broadcast_to(scores, (len(grid), len(inputs["likes"])))
+
+
+def sweep(history, grid: list[dict], version: int = 4, inputs: dict | None = None,
+          workers: int | None = None, chunk_size: int = 250) -> np.ndarray:
+    """
+    Score every user under every setting in `grid` with the formula registered
+    for `version`. Returns a (len(grid), history.n_users) array.
+
+    Grids larger than chunk_size are split across a process pool
+    (workers=None -> os.cpu_count(); workers=1 keeps it in-process).
+    `inputs` overrides history.totals() (e.g. windowed totals). Decayed
+    versions (v5) build decayed totals per distinct half_life_days in the grid.
+    """
+    if version not in score_formulas:
+        raise ValueError(f"Unsupported scoring version: {version}")
+    if not grid:
+        return np.empty((0, history.n_users))
+
+    if inputs is None and decay_half_life(version) is not None:
+        # decayed versions: likes/ratings depend on each setting's half-life
+        scores = np.empty((len(grid), history.n_users))
+        groups = defaultdict(list)
+        for i, params in enumerate(grid):
+            groups[decay_half_life(version, params)].append(i)
+        cycles = history.totals()["cycles"]
+        for half_life, idx in groups.items():
+            decayed = history.totals(half_life_days=half_life)
+            group_inputs = {"likes": decayed["likes"], "ratings": decayed["ratings"], "cycles": cycles}
+            scores[idx] = sweep(history, [grid[i] for i in idx], version, inputs=group_inputs,
+                                workers=workers, chunk_size=chunk_size)
+        return scores
+
+    inputs = inputs if inputs is not None else history.totals()
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(grid) <= chunk_size:
+        return _evaluate_chunk(version, inputs, grid)
+
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        parts = pool.map(_evaluate_chunk, itertools.repeat(version), itertools.repeat(inputs), chunks)
+        return np.vstack(list(parts))
+
+
+# --- Ranking stability -------------------------------------------------------
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """Average ranks along the last axis (1 = lowest), ties share a rank."""
+    order = np.argsort(scores, axis=-1, kind="stable")
+    sorted_scores = np.take_along_axis(scores, order, axis=-1)
+    ranks = np.empty_like(scores, dtype=float)
+
+    for row in range(scores.shape[0]):
+        s = sorted_scores[row]
+        # boundaries of runs of equal scores
+        starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+        ends = np.r_[starts[1:], len(s)]
+        avg = (starts + ends + 1) / 2.0
+        ranks[row, order[row]] = np.repeat(avg, ends - starts)
+    return ranks
+
+
+def ranking_stability(scores: np.ndarray, baseline: int = 0, top_k: int = 10) -> dict:
+    """
+    Compare every setting's leaderboard with the baseline row.
+      spearman      - rank correlation with the baseline (1.0 = same order)
+      top_k_overlap - share of the baseline's top-k users still in the top-k
+      max_rank_shift - largest number of places any single user moved
+    """
+    n_users = scores.shape[1]
+    if n_users < 2:
+        ones = np.ones(scores.shape[0])
+        return {"spearman": ones, "top_k_overlap": ones, "max_rank_shift": np.zeros(scores.shape[0])}
+
+    ranks = _ranks(scores)
+    centered = ranks - ranks.mean(axis=1, keepdims=True)
+    base = centered[baseline]
+    denom = np.sqrt((centered ** 2).sum(axis=1) * (base ** 2).sum())
+    spearman = np.divide(centered @ base, denom, out=np.ones(scores.shape[0]), where=denom > 0)
+
+    k = min(top_k, n_users)
+    top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    base_top = top[baseline]
+    overlap = np.isin(top, base_top).sum(axis=1) / k
+
+    max_shift = np.abs(ranks - ranks[baseline]).max(axis=1)
+
+    return {"spearman": spearman, "top_k_overlap": overlap, "max_rank_shift": max_shift}
+
+
+# --- One-call report ---------------------------------------------------------
+def backtest(history, grid: list[dict], version: int = 4, baseline_params: dict | None = None,
+             top_k: int = 10, workers: int | None = None) -> list[dict]:
+    """
+    Sweep `grid` and report each setting's stability against baseline_params
+    (defaults to the version's production params). One dict per setting:
+    params, mean/min/max score, spearman, top_k_overlap, max_rank_shift.
+    """
+    _, defaults = score_formulas.get(version, (None, None))
+    if defaults is None:
+        raise ValueError(f"Unsupported scoring version: {version}")
+    baseline_params = {name: (baseline_params or defaults)[name] for name in grid[0]} if grid else {}
+
+    settings = [baseline_params] + list(grid)
+    scores = sweep(history, settings, version=version, workers=workers)
+    stability = ranking_stability(scores, baseline=0, top_k=top_k)
+
+    report = []
+    for i, params in enumerate(grid, start=1):
+        row = scores[i]
+        report.append({
+            "params": params,
+            "mean_score": float(row.mean()) if row.size else None,
+            "min_score": float(row.min()) if row.size else None,
+            "max_score": float(row.max()) if row.size else None,
+            "spearman": float(stability["spearman"][i]),
+            "top_k_overlap": float(stability["top_k_overlap"][i]),
+            "max_rank_shift": float(stability["max_rank_shift"][i]),
+        })
+    return report
@@ -0,0 +1,158 @@
+# services/circle_scoring.py
+#
+# Circle-partitioned Drop Cred: every circle is scored on its own (members,
+# their submissions and the feedback on them), partitions are spread over a
+# process pool, and the per-circle results are merged into one cross-circle
+# score per user. Both land in drop_creds (circle_id set / NULL).
+
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import func, case
+
+from services.scoring import V4_PARAMS, v4_formula, bulk_upsert_drop_creds
+from utils.helpers import TESTING_MODE
+
+SERIAL_BELOW = 50   # fewer circles than this isn't worth a process pool
+
+
+# --- Loading (parent process, fixed number of queries) -----------------------
+def load_circle_partitions() -> dict:
+    """
+    {circle_id: {"members": [user_id, ...],
+                 "cycles": {user_id: [cycle_date ordinal, ...]},
+                 "feedback": {user_id: (likes, ratings)}}}
+    """
+    from models import db, Submission, SongFeedback, CircleMembership
+
+    parts = defaultdict(lambda: {"members": [], "cycles": defaultdict(list), "feedback": {}})
+
+    for circle_id, user_id in db.session.query(CircleMembership.circle_id, CircleMembership.user_id):
+        parts[circle_id]["members"].append(user_id)
+
+    for circle_id, user_id, cycle_date in (
+        db.session.query(Submission.circle_id, Submission.user_id, Submission.cycle_date).distinct()
+    ):
+        parts[circle_id]["cycles"][user_id].append(cycle_date.toordinal())
+
+    for circle_id, user_id, likes, ratings in (
+        db.session.query(
+            Submission.circle_id,
+            Submission.user_id,
+            func.sum(case((SongFeedback.feedback == "like", 1), else_=0)),
+            func.count(SongFeedback.id),
+        )
+        .join(SongFeedback, SongFeedback.song_id == Submission.id)
+        .group_by(Submission.circle_id, Submission.user_id)
+    ):
+        parts[circle_id]["feedback"][user_id] = (int(likes or 0), int(ratings or 0))
+
+    # plain dicts so partitions pickle cleanly into workers
+    return {
+        cid: {"members": p["members"], "cycles": dict(p["cycles"]), "feedback": p["feedback"]}
+        for cid, p in parts.items()
+    }
+
+
+# --- Partition worker (pure, runs in the pool) -------------------------------
+def _score_partitions(batch: list, params: dict) -> tuple[list, dict]:
+    """
+    Score a batch of (circle_id, partition) pairs.
+    Returns (per-circle rows, {user_id: [likes, ratings, set(cycle ordinals)]})
+    where the second part feeds the cross-circle merge.
+    """
+    rows = []
+    partials = {}
+    for circle_id, part in batch:
+        members = part["members"]
+        n_members = len(members)
+
+        for uid in members:
+            likes, ratings = part["feedback"].get(uid, (0, 0))
+            cycles = len(part["cycles"].get(uid, ()))
+            score = v4_formula(likes, ratings, cycles, n_members, **params)
+            rows.append({
+                "user_id": uid,
+                "circle_id": circle_id,
+                "total_likes": likes,
+                "total_dislikes": max(ratings - likes, 0),
+                "total_possible": ratings,
+                "drop_cred_score": float(score),
+                "params": {**params, "cycles": cycles, "circle_members": n_members},
+            })
+
+        # cross-circle inputs include songs in circles the user has since left
+        for uid in set(members) | set(part["feedback"]) | set(part["cycles"]):
+            likes, ratings = part["feedback"].get(uid, (0, 0))
+            acc = partials.setdefault(uid, [0, 0, set()])
+            acc[0] += likes
+            acc[1] += ratings
+            acc[2].update(part["cycles"].get(uid, ()))
+    return rows, partials
+
+
+def _batches(partitions: dict, n_batches: int) -> list[list]:
+    # biggest circles first, dealt round-robin so batches come out roughly even
+    ordered = sorted(partitions.items(), key=lambda kv: len(kv[1]["members"]), reverse=True)
+    batches = [[] for _ in range(max(1, n_batches))]
+    for i, item in enumerate(ordered):
+        batches[i % len(batches)].append(item)
+    return [b for b in batches if b]
+
+
+# --- Entry point -------------------------------------------------------------
+def score_v4_per_circle(workers: int | None = None) -> int:
+    """
+    v4 per circle + cross-circle, written to drop_creds in one bulk upsert.
+    workers=None -> os.cpu_count(); workers=1 (or a small tree) stays in-process.
+    Returns the number of rows written.
+    """
+    from models import db
+
+    params = V4_PARAMS
+    partitions = load_circle_partitions()
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(partitions) < SERIAL_BELOW:
+        results = [_score_partitions(list(partitions.items()), params)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = _batches(partitions, workers * 4)
+            results = list(pool.map(_score_partitions, batches, [params] * len(batches)))
+
+    rows = []
+    merged = {}
+    for circle_rows, partials in results:
+        rows.extend(circle_rows)
+        for uid, (likes, ratings, cycles) in partials.items():
+            acc = merged.setdefault(uid, [0, 0, set()])
+            acc[0] += likes
+            acc[1] += ratings
+            acc[2] |= cycles
+
+    # cross-circle rows: same inputs as the dashboard's single-user path
+    for uid, (likes, ratings, cycles) in merged.items():
+        score = v4_formula(likes, ratings, len(cycles), **params)
+        rows.append({
+            "user_id": uid,
+            "circle_id": None,
+            "total_likes": likes,
+            "total_dislikes": max(ratings - likes, 0),
+            "total_possible": ratings,
+            "drop_cred_score": float(score),
+            "params": {**params, "cycles": len(cycles)},
+        })
+
+    bulk_upsert_drop_creds(rows, score_version=4)
+    db.session.commit()
+
+    if TESTING_MODE:
+        print(f"[SCORING v4/circle] {len(partitions)} circle(s), {len(rows)} row(s), workers={workers}")
+    return len(rows)
+
+
+# --- Registry ----------------------------------------------------------------
+circle_scoring_registry = {
+    4: score_v4_per_circle,
+}
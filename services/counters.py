@@ -0,0 +1,282 @@
+# services/counters.py
+
+import math
+from datetime import datetime
+
+import pytz
+from sqlalchemy import func, case
+from sqlalchemy.exc import IntegrityError
+
+from services.scoring import V5_PARAMS, decay_rate, invalidate_drop_cred_cache
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+
+# v5 decay shared by every counters write/read
+_DECAY_RATE = decay_rate(V5_PARAMS["half_life_days"])
+
+
+def _naive_utc(ts):
+    # DB drivers hand back naive (SQLite) or aware (Postgres) values for the same column
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(pytz.UTC).replace(tzinfo=None)
+
+
+def _decay_factor(since, now) -> float:
+    if since is None:
+        return 0.0
+    return math.exp(-_DECAY_RATE * max((now - since).total_seconds(), 0))
+
+
+# --- Backfill ----------------------------------------------------------------
+def _aggregate_from_history(user_id: int) -> tuple[int, int, int]:
+    """
+    Slow path: recount one user's likes/ratings received and distinct cycles
+    straight from song_feedback + submissions. Only used to seed a missing row.
+    """
+    from models import db, Submission, SongFeedback
+
+    likes, ratings = (
+        db.session.query(
+            func.sum(case((SongFeedback.feedback == "like", 1), else_=0)),
+            func.count(SongFeedback.id),
+        )
+        .join(Submission, SongFeedback.song_id == Submission.id)
+        .filter(Submission.user_id == user_id)
+        .one()
+    )
+    cycles = (
+        db.session.query(func.count(func.distinct(Submission.cycle_date)))
+        .filter(Submission.user_id == user_id)
+        .scalar()
+    )
+    return int(likes or 0), int(ratings or 0), int(cycles or 0)
+
+
+def _decayed_from_history(user_id: int, now: datetime) -> tuple[float, float]:
+    """Slow path: v5 decayed likes/ratings for one user as of `now`."""
+    from models import db, Submission, SongFeedback
+
+    d_likes = d_ratings = 0.0
+    rows = (
+        db.session.query(SongFeedback.feedback, SongFeedback.timestamp)
+        .join(Submission, SongFeedback.song_id == Submission.id)
+        .filter(Submission.user_id == user_id)
+    )
+    for value, ts in rows:
+        w = _decay_factor(_naive_utc(ts), now)
+        d_ratings += w
+        d_likes += w * (value == "like")
+    return d_likes, d_ratings
+
+
+def ensure_counters(user_id: int):
+    """
+    Return the user's DropCredCounter row, seeding it from history if missing.
+    Call BEFORE mutating that user's feedback/submissions so the seed reflects
+    the pre-write state and the caller's delta is applied exactly once.
+    Does not commit.
+    """
+    from models import db, DropCredCounter, utcnow
+
+    row = db.session.get(DropCredCounter, user_id)
+    if row is not None:
+        if row.decayed_at is None:
+            # pre-v5 row: seed the decayed state once
+            now = datetime.utcnow()
+            row.decayed_likes, row.decayed_ratings = _decayed_from_history(user_id, now)
+            row.decayed_at = pytz.UTC.localize(now)
+            db.session.flush()
+        return row
+
+    now = datetime.utcnow()
+    likes, ratings, cycles = _aggregate_from_history(user_id)
+    d_likes, d_ratings = _decayed_from_history(user_id, now)
+    try:
+        with db.session.begin_nested():
+            row = DropCredCounter(
+                user_id=user_id,
+                likes_received=likes,
+                ratings_received=ratings,
+                cycles_submitted=cycles,
+                decayed_likes=d_likes,
+                decayed_ratings=d_ratings,
+                decayed_at=pytz.UTC.localize(now),
+                updated_at=utcnow(),
+            )
+            db.session.add(row)
+    except IntegrityError:
+        # another request seeded it first
+        row = db.session.get(DropCredCounter, user_id, populate_existing=True)
+    return row
+
+
+# --- Write paths -------------------------------------------------------------
+def record_feedback(owner_id: int, old_value: str | None, new_value: str,
+                    old_timestamp: datetime | None = None, at: datetime | None = None) -> None:
+    """
+    Apply one feedback write on a song owned by owner_id.
+    old_value is the previous 'like'/'dislike' (None for a brand new rating),
+    so a like flipping to a dislike moves one like out without adding a rating.
+    old_timestamp is when that previous value was stored: the route re-stamps a
+    changed rating, so its decayed weight is taken out and re-added at weight 1.
+    O(1) and runs inside the caller's transaction (row locked on Postgres).
+    """
+    from models import DropCredCounter, utcnow
+
+    at = _naive_utc(at) or datetime.utcnow()
+    d_likes = int(new_value == "like") - int(old_value == "like")
+    d_ratings = 0 if old_value is not None else 1
+
+    ensure_counters(owner_id)
+    row = (DropCredCounter.query
+           .filter(DropCredCounter.user_id == owner_id)
+           .with_for_update()
+           .populate_existing()
+           .one())
+
+    row.likes_received += d_likes
+    row.ratings_received += d_ratings
+
+    # v5: roll the decayed state forward to `at`, drop the old rating's weight, add the new one
+    factor = _decay_factor(_naive_utc(row.decayed_at), at)
+    dl, dr = row.decayed_likes * factor, row.decayed_ratings * factor
+    if old_value is not None:
+        w_old = _decay_factor(_naive_utc(old_timestamp), at) if old_timestamp else 0.0
+        dl -= w_old * (old_value == "like")
+        dr -= w_old
+    dl += (new_value == "like")
+    dr += 1.0
+    row.decayed_likes, row.decayed_ratings = max(dl, 0.0), max(dr, 0.0)
+    row.decayed_at = pytz.UTC.localize(at)
+    row.updated_at = utcnow()
+    invalidate_drop_cred_cache(owner_id)
+
+
+def record_submission(user_id: int, cycle_date) -> None:
+    """
+    Apply one new submission. Must run before the Submission row is added so
+    the "first submission in this cycle" check doesn't see the new row.
+    """
+    from models import db, Submission, DropCredCounter, utcnow
+
+    ensure_counters(user_id)
+    seen_cycle = db.session.query(
+        Submission.query.filter_by(user_id=user_id, cycle_date=cycle_date).exists()
+    ).scalar()
+    if seen_cycle:
+        return
+
+    db.session.query(DropCredCounter).filter(DropCredCounter.user_id == user_id).update({
+        DropCredCounter.cycles_submitted: DropCredCounter.cycles_submitted + 1,
+        DropCredCounter.updated_at: utcnow(),
+    })
+    invalidate_drop_cred_cache(user_id)
+
+
+def invalidate_counters(user_ids) -> None:
+    """
+    Drop counter rows after bulk deletes (circle delete, account wipe) so the
+    next read reseeds them from history. Does not commit.
+    """
+    from models import DropCredCounter
+
+    user_ids = list({uid for uid in user_ids if uid is not None})
+    if user_ids:
+        DropCredCounter.query.filter(DropCredCounter.user_id.in_(user_ids)).delete(synchronize_session=False)
+    for uid in user_ids:
+        invalidate_drop_cred_cache(uid)
+
+
+# --- Read path ---------------------------------------------------------------
+def get_counters(user_id: int) -> dict:
+    """
+    O(1) read of a user's Drop Cred inputs (one primary-key lookup).
+    A missing row is seeded once and committed.
+    """
+    from models import db, DropCredCounter
+
+    row = db.session.get(DropCredCounter, user_id)
+    if row is None:
+        row = ensure_counters(user_id)
+        db.session.commit()
+
+    if row.decayed_at is None:
+        ensure_counters(user_id)
+        db.session.commit()
+
+    # v5 state rolled forward to now (read-only; nothing is written back)
+    factor = _decay_factor(_naive_utc(row.decayed_at), datetime.utcnow())
+    return {
+        "likes": row.likes_received,
+        "ratings": row.ratings_received,
+        "cycles": row.cycles_submitted,
+        "decayed_likes": row.decayed_likes * factor,
+        "decayed_ratings": row.decayed_ratings * factor,
+        "updated_at": row.updated_at,   # watermark for services/scoring.py's result cache
+    }
+
+
+# --- Full rebuild ------------------------------------------------------------
+def rebuild_counters() -> int:
+    """
+    Recompute every user's counters with grouped queries and rewrite the table.
+    Returns the number of rows written.
+    """
+    from models import db, Submission, SongFeedback, DropCredCounter, utcnow
+    from sqlalchemy import insert
+
+    feedback = {
+        uid: (likes or 0, ratings or 0)
+        for uid, likes, ratings in (
+            db.session.query(
+                Submission.user_id,
+                func.sum(case((SongFeedback.feedback == "like", 1), else_=0)),
+                func.count(SongFeedback.id),
+            )
+            .join(SongFeedback, SongFeedback.song_id == Submission.id)
+            .group_by(Submission.user_id)
+            .all()
+        )
+    }
+    cycles = dict(
+        db.session.query(Submission.user_id, func.count(func.distinct(Submission.cycle_date)))
+        .group_by(Submission.user_id)
+        .all()
+    )
+
+    # v5 decayed sums, one streamed pass
+    now_naive = datetime.utcnow()
+    decayed = {}
+    for uid, value, ts in (
+        db.session.query(Submission.user_id, SongFeedback.feedback, SongFeedback.timestamp)
+        .join(SongFeedback, SongFeedback.song_id == Submission.id)
+        .yield_per(5000)
+    ):
+        w = _decay_factor(_naive_utc(ts), now_naive)
+        acc = decayed.setdefault(uid, [0.0, 0.0])
+        acc[0] += w * (value == "like")
+        acc[1] += w
+
+    now = utcnow()
+    rows = [
+        {
+            "user_id": uid,
+            "likes_received": int(feedback.get(uid, (0, 0))[0]),
+            "ratings_received": int(feedback.get(uid, (0, 0))[1]),
+            "cycles_submitted": int(cycles.get(uid, 0)),
+            "decayed_likes": decayed.get(uid, (0.0, 0.0))[0],
+            "decayed_ratings": decayed.get(uid, (0.0, 0.0))[1],
+            "decayed_at": pytz.UTC.localize(now_naive),
+            "updated_at": now,
+        }
+        for uid in set(feedback) | set(cycles)
+    ]
+
+    DropCredCounter.query.delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(DropCredCounter), rows)
+    db.session.commit()
+    for row in rows:
+        invalidate_drop_cred_cache(row["user_id"])
+    return len(rows)
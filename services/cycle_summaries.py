@@ -0,0 +1,177 @@
+# services/cycle_summaries.py
+#
+# Cycle results and finalization. cycle_results() aggregates one cycle in a
+# single grouped query (by submissions.cycle_id): hottest drop(s),
+# like/dislike totals and participation. The dashboard runs it live for the cycle members are rating
+# now (its "previous cycle"). A cycle's songs are rated during the cycle
+# after it, so its results are final once that rating cycle has ended, plus
+# FINALIZE_GRACE for late ratings from open tabs; `flask finalize-cycles`
+# then freezes them once into cycle_summaries and the cycle is never
+# aggregated again: the dashboard's past-cycles history (and the hottest
+# card, once its cycle is frozen) reads recent_summaries() instead.
+
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import func, case
+from sqlalchemy.exc import IntegrityError
+
+from services.cycles import assign_cycle_ids
+from utils.helpers import TESTING_MODE
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+FINALIZE_GRACE = timedelta(hours=1)   # late ratings accepted after the rating cycle ends
+PAST_CYCLES = 5                       # frozen cycles shown in the dashboard history
+
+
+def _hottest(rows) -> list[dict]:
+    # top (net, likes) among songs with at least one like; ties are all kept, oldest submission first
+    liked = [r for r in rows if r.likes > 0]
+    if not liked:
+        return []
+    top = max((r.likes - r.dislikes, r.likes) for r in liked)
+    return [
+        {
+            "submission_id": r.submission_id,
+            "spotify_track_id": r.spotify_track_id,
+            "submitter_username": r.submitter_username,
+            "likes": r.likes,
+            "dislikes": r.dislikes,
+        }
+        for r in sorted(liked, key=lambda r: r.submission_id)
+        if (r.likes - r.dislikes, r.likes) == top
+    ]
+
+
+def cycle_results(cycle_id: int) -> dict:
+    """
+    Results for the submissions made in one cycle (one grouped query on the
+    cycle_id index):
+    {"hottest", "total_likes", "total_dislikes", "submissions", "participants"}.
+    """
+    from models import db, Submission, SongFeedback, User
+
+    likes = func.coalesce(func.sum(case((SongFeedback.feedback == 'like', 1), else_=0)), 0).label('likes')
+    dislikes = func.coalesce(func.sum(case((SongFeedback.feedback == 'dislike', 1), else_=0)), 0).label('dislikes')
+    rows = (
+        db.session.query(
+            Submission.id.label('submission_id'),
+            Submission.user_id,
+            Submission.spotify_track_id,
+            User.vibedrop_username.label('submitter_username'),
+            likes, dislikes,
+        )
+        .join(User, User.id == Submission.user_id)
+        .outerjoin(SongFeedback, SongFeedback.song_id == Submission.id)
+        .filter(Submission.cycle_id == cycle_id)
+        .group_by(Submission.id, Submission.user_id, Submission.spotify_track_id, User.vibedrop_username)
+        .all()
+    )
+    return {
+        "hottest": _hottest(rows),
+        "total_likes": sum(r.likes for r in rows),
+        "total_dislikes": sum(r.dislikes for r in rows),
+        "submissions": len(rows),
+        "participants": len({r.user_id for r in rows}),
+    }
+
+
+def summary_results(summary) -> dict:
+    """A frozen CycleSummary in cycle_results() form (plus raters/members)."""
+    return {
+        "hottest": list(summary.hottest or []),
+        "total_likes": summary.total_likes,
+        "total_dislikes": summary.total_dislikes,
+        "submissions": summary.submissions,
+        "participants": summary.participants,
+        "raters": summary.raters,
+        "members": summary.members,
+    }
+
+
+def recent_summaries(circle_id: int, through_cycle_no: int, limit: int = PAST_CYCLES) -> list:
+    """
+    Newest-first (CycleSummary, cycle starts_at) rows for a circle's cycles
+    numbered <= through_cycle_no; a seek on ix_cycle_summaries_circle_cycle_no.
+    """
+    from models import db, Cycle, CycleSummary
+
+    return (
+        db.session.query(CycleSummary, Cycle.starts_at)
+        .join(Cycle, Cycle.id == CycleSummary.cycle_id)
+        .filter(CycleSummary.circle_id == circle_id, CycleSummary.cycle_no <= through_cycle_no)
+        .order_by(CycleSummary.cycle_no.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def finalize_cycle(cycle, members: int):
+    """
+    Freeze one cycle's results (cycle_results plus distinct raters) into a
+    CycleSummary. Another worker finalizing the same cycle first wins.
+    Does not commit; returns the new row or None.
+    """
+    from models import db, Submission, SongFeedback, CycleSummary, utcnow
+
+    results = cycle_results(cycle.id)
+    raters = (
+        db.session.query(func.count(func.distinct(SongFeedback.user_id)))
+        .join(Submission, Submission.id == SongFeedback.song_id)
+        .filter(Submission.cycle_id == cycle.id)
+        .scalar()
+    ) or 0
+
+    summary = CycleSummary(
+        cycle_id=cycle.id,
+        circle_id=cycle.circle_id,
+        cycle_no=cycle.cycle_no,
+        raters=raters,
+        members=members,
+        finalized_at=utcnow(),
+        **results,
+    )
+    try:
+        with db.session.begin_nested():
+            db.session.add(summary)
+    except IntegrityError:
+        return None
+    return summary
+
+
+def finalize_due_cycles(grace: timedelta = FINALIZE_GRACE, now: datetime | None = None) -> int:
+    """
+    Finalize every cycle whose rating cycle ended more than `grace` ago and
+    that has no summary yet (cron / CLI). Submissions still missing a cycle_id
+    are assigned first, so a summary never freezes a partial cycle.
+    Commits per circle; returns rows written.
+    """
+    from models import db, SoundCircle, CircleMembership, Cycle, CycleSummary
+
+    cutoff = (now or datetime.now(pytz.UTC)) - grace
+    written = 0
+    for circle in SoundCircle.query.all():
+        # the newest cycle that ended before the cutoff was the rating cycle of the one before it
+        rated_through = (db.session.query(func.max(Cycle.cycle_no))
+                         .filter(Cycle.circle_id == circle.id, Cycle.ends_at <= cutoff)
+                         .scalar())
+        if rated_through is None:
+            continue
+        due = (Cycle.query
+               .outerjoin(CycleSummary, CycleSummary.cycle_id == Cycle.id)
+               .filter(CycleSummary.id.is_(None))
+               .filter(Cycle.circle_id == circle.id, Cycle.cycle_no < rated_through)
+               .order_by(Cycle.cycle_no)
+               .all())
+        if not due:
+            continue
+        if assign_cycle_ids(circle):
+            db.session.flush()
+        members = CircleMembership.query.filter_by(circle_id=circle.id).count()
+        for cycle in due:
+            if finalize_cycle(cycle, members) is not None:
+                written += 1
+        db.session.commit()
+        if TESTING_MODE:
+            print(f"[CYCLES] finalized {len(due)} cycle(s) for circle_id={circle.id} through #{due[-1].cycle_no}")
+    return written
@@ -0,0 +1,213 @@
+# services/cycles.py
+#
+# Materialized drop cycles. Each circle's cycles (one row per drop-to-drop
+# span, numbered 1, 2, 3...) are written ahead of time from
+# services/schedule.py, so a closed cycle keeps the bounds it actually ran
+# with after a schedule edit, and every Submission stores the cycle it was
+# made in, so "which submissions belong to this cycle" is an equality seek on
+# submissions.cycle_id instead of a submitted_at range scan.
+#
+#   cycle = current_cycle(circle)               # submit path: sets Submission.cycle_id
+#   rows = cycle_submissions([cycle.id], Submission.id, ...)   # reads by cycle
+#   flask materialize-cycles                    # cron: keep CYCLES_AHEAD cycles ready
+#   flask backfill-cycles                       # once, right after the migration: history + existing submissions
+
+from datetime import datetime
+
+import pytz
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from services.schedule import compute_cycle_window
+from utils.helpers import TESTING_MODE
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+CYCLES_AHEAD = 8   # future cycles kept materialized past the current one
+
+
+def _aware_utc(ts):
+    # SQLite hands back naive UTC, Postgres an aware value
+    return pytz.UTC.localize(ts) if ts.tzinfo is None else ts.astimezone(pytz.UTC)
+
+
+def _next_drop(circle, after):
+    window = compute_cycle_window(circle, after)
+    return window[0] if window else None
+
+
+# --- Materialize -------------------------------------------------------------
+def ensure_cycles(circle, start: datetime | None = None, until: datetime | None = None,
+                  ahead: int = CYCLES_AHEAD) -> int:
+    """
+    Extend the circle's cycles so they cover `until` (default: now) plus
+    `ahead` further cycles. A circle without cycles starts at the drop at or
+    before `start` (default: circle.created_at). A concurrent writer adding
+    the same cycles is ignored. Does not commit; returns rows added.
+    """
+    from models import db, Cycle
+
+    now = datetime.now(pytz.UTC)
+    until = until or now
+    last = (Cycle.query.filter_by(circle_id=circle.id)
+            .order_by(Cycle.cycle_no.desc())
+            .first())
+    if last is not None:
+        cycle_no, starts_at = last.cycle_no + 1, _aware_utc(last.ends_at)
+        ahead -= Cycle.query.filter(Cycle.circle_id == circle.id, Cycle.starts_at > until).count()
+    else:
+        first = compute_cycle_window(circle, min(_aware_utc(start or circle.created_at or now), now))
+        if first is None:
+            return 0    # incomplete schedule
+        cycle_no, starts_at = 1, first[1]
+
+    rows = []
+    while ahead > 0 or starts_at <= until:
+        ends_at = _next_drop(circle, starts_at)
+        if ends_at is None:
+            break
+        rows.append(Cycle(circle_id=circle.id, cycle_no=cycle_no, starts_at=starts_at, ends_at=ends_at))
+        if starts_at > until:
+            ahead -= 1
+        cycle_no, starts_at = cycle_no + 1, ends_at
+    if not rows:
+        return 0
+
+    try:
+        with db.session.begin_nested():
+            db.session.add_all(rows)
+    except IntegrityError:
+        return 0    # another worker materialized them first
+
+    if TESTING_MODE:
+        print(f"[CYCLES] circle_id={circle.id}: +{len(rows)} cycle(s) through #{cycle_no - 1}")
+    return len(rows)
+
+
+def reschedule_cycles(circle) -> None:
+    """
+    After a schedule edit: the current cycle now ends at the new next drop and
+    the (empty) future cycles are rebuilt from there. Past cycles keep the
+    schedule they ran on. Does not commit.
+    """
+    from models import db, Cycle
+
+    now = datetime.now(pytz.UTC)
+    window = compute_cycle_window(circle, now)
+    (Cycle.query
+     .filter(Cycle.circle_id == circle.id, Cycle.starts_at > now)
+     .delete(synchronize_session=False))
+    current = (Cycle.query
+               .filter(Cycle.circle_id == circle.id, Cycle.starts_at <= now)
+               .order_by(Cycle.cycle_no.desc())
+               .first())
+    if current is not None and window is not None:
+        current.ends_at = window[0]
+    db.session.flush()
+    ensure_cycles(circle)
+
+
+# --- Lookups -----------------------------------------------------------------
+def cycle_at(circle_id: int, ts: datetime):
+    """The Cycle row containing ts (starts_at <= ts < ends_at), or None; one index seek."""
+    from models import Cycle
+
+    row = (Cycle.query
+           .filter(Cycle.circle_id == circle_id, Cycle.starts_at <= ts)
+           .order_by(Cycle.starts_at.desc())
+           .first())
+    return row if row is not None and _aware_utc(row.ends_at) > ts else None
+
+
+def current_cycle(circle):
+    """The Cycle open now (materialized on demand), or None for an incomplete schedule. Does not commit."""
+    now = datetime.now(pytz.UTC)
+    row = cycle_at(circle.id, now)
+    if row is None and ensure_cycles(circle):
+        row = cycle_at(circle.id, now)
+    return row
+
+
+def previous_cycle(circle):
+    """The Cycle that closed most recently, or None."""
+    from models import Cycle
+
+    return (Cycle.query
+            .filter(Cycle.circle_id == circle.id, Cycle.ends_at <= datetime.now(pytz.UTC))
+            .order_by(Cycle.starts_at.desc())
+            .first())
+
+
+def cycle_submissions(cycle_ids, *columns) -> list:
+    """
+    Submissions made in the given cycles, newest first, as rows of just
+    `columns` (default: id, user_id, spotify_track_id, submitted_at, cycle_id).
+    An equality seek on submissions.cycle_id, so the cost follows the cycles
+    asked for, not the circle's whole history.
+    """
+    from models import db, Submission
+
+    cycle_ids = [cid for cid in cycle_ids if cid is not None]
+    if not cycle_ids:
+        return []
+    columns = columns or (Submission.id, Submission.user_id, Submission.spotify_track_id,
+                          Submission.submitted_at, Submission.cycle_id)
+    return (db.session.query(*columns)
+            .filter(Submission.cycle_id.in_(cycle_ids))
+            .order_by(Submission.submitted_at.desc())
+            .all())
+
+
+# --- Batch jobs --------------------------------------------------------------
+def materialize_cycles() -> int:
+    """Keep every circle CYCLES_AHEAD cycles ahead (cron / CLI). Commits; returns rows added."""
+    from models import db, SoundCircle
+
+    added = 0
+    for circle in SoundCircle.query.all():
+        added += ensure_cycles(circle)
+        db.session.commit()
+    return added
+
+
+def assign_cycle_ids(circle) -> int:
+    """
+    Set cycle_id on the circle's submissions that still have none (made
+    before backfill-cycles ran, or while the schedule was incomplete) from
+    the cycle containing submitted_at. Normally finds nothing in one seek on
+    the cycle_id index. Does not commit; returns submissions assigned.
+    """
+    from models import Submission
+
+    assigned = 0
+    for sub in Submission.query.filter(Submission.circle_id == circle.id, Submission.cycle_id.is_(None)):
+        cycle = cycle_at(circle.id, _aware_utc(sub.submitted_at))
+        if cycle is not None:
+            sub.cycle_id = cycle.id
+            assigned += 1
+    return assigned
+
+
+def backfill_cycles() -> tuple[int, int]:
+    """
+    Materialize each circle's cycles (from its first submission for circles
+    without any yet) and set cycle_id on submissions that don't have one, by
+    submitted_at containment. History uses the current schedule. Commits per
+    circle; returns (cycles added, submissions assigned).
+    """
+    from models import db, SoundCircle, Submission, Cycle
+
+    cycles_added = assigned = 0
+    for circle in SoundCircle.query.all():
+        first_sub = (db.session.query(func.min(Submission.submitted_at))
+                     .filter(Submission.circle_id == circle.id)
+                     .scalar())
+        start = min((_aware_utc(ts) for ts in (first_sub, circle.created_at) if ts is not None), default=None)
+        cycles_added += ensure_cycles(circle, start=start)
+
+        for cycle in Cycle.query.filter_by(circle_id=circle.id).order_by(Cycle.cycle_no):
+            assigned += (Submission.query
+                         .filter(Submission.circle_id == circle.id, Submission.cycle_id.is_(None))
+                         .filter(Submission.submitted_at >= cycle.starts_at, Submission.submitted_at < cycle.ends_at)
+                         .update({Submission.cycle_id: cycle.id}, synchronize_session=False))
+        db.session.commit()
+    return cycles_added, assigned
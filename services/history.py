@@ -0,0 +1,358 @@
+# services/history.py
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytz
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+
+# --- In-memory feedback/submission history -----------------------------------
+class ScoringHistory:
+    """
+    Column arrays of every submission and every feedback row, loaded once.
+    Users are addressed by position in `user_ids`; all *_owner arrays hold
+    those positions (the submitter, for feedback rows).
+
+    Times are UTC epoch seconds (int64); cycle dates are days since 1970-01-01.
+    """
+
+    def __init__(self, user_ids, sub_owner, sub_circle, sub_cycle, fb_owner, fb_like, fb_time, fb_cycle):
+        self.user_ids = user_ids
+        self.sub_owner = sub_owner
+        self.sub_circle = sub_circle
+        self.sub_cycle = sub_cycle
+        self.fb_owner = fb_owner
+        self.fb_like = fb_like
+        self.fb_time = fb_time
+        self.fb_cycle = fb_cycle
+
+    @property
+    def n_users(self) -> int:
+        return len(self.user_ids)
+
+    def index_of(self, user_id: int) -> int | None:
+        i = int(np.searchsorted(self.user_ids, user_id))
+        if i < len(self.user_ids) and self.user_ids[i] == user_id:
+            return i
+        return None
+
+    def totals(self, half_life_days: float | None = None, at=None) -> dict:
+        """
+        Lifetime per-user inputs, same scope as the dashboard (across circles):
+        {"likes", "ratings", "cycles"} -> arrays of length n_users.
+        With half_life_days, likes/ratings are exponentially decayed sums as of
+        `at` (default now) instead of counts.
+        """
+        n = self.n_users
+        if half_life_days is None:
+            likes = np.bincount(self.fb_owner, weights=self.fb_like, minlength=n).astype(np.int64)
+            ratings = np.bincount(self.fb_owner, minlength=n).astype(np.int64)
+        else:
+            from services.scoring import decay_weights
+
+            now_s = to_epoch_seconds(at or datetime.utcnow())
+            w = decay_weights(now_s - self.fb_time, half_life_days)
+            likes = np.bincount(self.fb_owner, weights=w * self.fb_like, minlength=n)
+            ratings = np.bincount(self.fb_owner, weights=w, minlength=n)
+
+        # distinct (user, cycle) pairs
+        pairs = np.unique(np.stack([self.sub_owner, self.sub_cycle]), axis=1)
+        cycles = np.bincount(pairs[0], minlength=n).astype(np.int64)
+
+        return {"likes": likes, "ratings": ratings, "cycles": cycles}
+
+    def __repr__(self):
+        return (f"<ScoringHistory users={self.n_users} submissions={len(self.sub_owner)} "
+                f"feedback={len(self.fb_owner)}>")
+
+
+def _epoch_seconds(values) -> np.ndarray:
+    # naive datetimes are UTC in this schema (datetime.utcnow defaults); missing -> epoch 0
+    out = np.array(
+        [
+            None if v is None else (v if v.tzinfo is None else v.astimezone(pytz.UTC).replace(tzinfo=None))
+            for v in values
+        ],
+        dtype="datetime64[s]",
+    )
+    return np.where(np.isnat(out), 0, out.astype(np.int64))
+
+
+def _epoch_days(values) -> np.ndarray:
+    return np.array(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def load_history() -> ScoringHistory:
+    """
+    Two streaming SELECTs (submissions, then feedback joined to its submission)
+    turned into NumPy columns. Needs an app context.
+    """
+    from models import db, Submission, SongFeedback
+
+    subs = (
+        db.session.query(Submission.user_id, Submission.circle_id, Submission.cycle_date)
+        .order_by(Submission.id)
+        .all()
+    )
+    fbs = (
+        db.session.query(Submission.user_id, SongFeedback.feedback, SongFeedback.timestamp, Submission.cycle_date)
+        .join(Submission, SongFeedback.song_id == Submission.id)
+        .order_by(SongFeedback.timestamp, SongFeedback.id)
+        .all()
+    )
+
+    sub_uid = np.array([r[0] for r in subs], dtype=np.int64)
+    user_ids = np.unique(sub_uid)
+
+    fb_uid = np.array([r[0] for r in fbs], dtype=np.int64)
+    return ScoringHistory(
+        user_ids=user_ids,
+        sub_owner=np.searchsorted(user_ids, sub_uid),
+        sub_circle=np.array([r[1] for r in subs], dtype=np.int64),
+        sub_cycle=_epoch_days([r[2] for r in subs]),
+        fb_owner=np.searchsorted(user_ids, fb_uid),
+        fb_like=np.array([r[1] == "like" for r in fbs], dtype=bool),
+        fb_time=_epoch_seconds([r[2] for r in fbs]),
+        fb_cycle=_epoch_days([r[3] for r in fbs]),
+    )
+
+
+# --- Point-in-time ("as of") queries -----------------------------------------
+_TIME_BITS = 33   # epoch seconds fit until ~2242
+_DAY_BITS = 20    # epoch days fit until ~4840
+
+
+def to_epoch_seconds(at) -> int:
+    """datetime (naive = UTC) -> epoch seconds."""
+    if at.tzinfo is None:
+        at = pytz.UTC.localize(at)
+    return int(at.timestamp())
+
+
+class CumulativeIndex:
+    """
+    Prefix sums over ScoringHistory so a user's likes / ratings / cycles for any
+    time range is two binary searches instead of a scan.
+
+    Rows are sorted by (user, time) and encoded as one int64 key
+    (user << 33 | time), which makes a lookup vectorizable across users and
+    across timestamps at once. Per-cycle windows use a second ordering by
+    (user, cycle_date, time).
+
+    song_feedback keeps only the current like/dislike, so a flipped rating
+    counts from its latest timestamp with its latest value.
+    """
+
+    def __init__(self, history: ScoringHistory):
+        self.history = history
+        owner = history.fb_owner.astype(np.int64)
+        time = np.clip(history.fb_time, 0, None)
+
+        # feedback by (user, time)
+        order = np.lexsort((time, owner))
+        self._fb_keys = (owner[order] << _TIME_BITS) | time[order]
+        like = history.fb_like[order].astype(np.int64)
+        self._cum_likes = np.concatenate(([0], np.cumsum(like)))
+        self._sorted = {"fb": (time[order], like)}
+
+        # distinct submitted cycles by (user, day)
+        pairs = np.unique((history.sub_owner.astype(np.int64) << _DAY_BITS) | history.sub_cycle)
+        self._cycle_keys = pairs
+
+        # feedback by (user, cycle, time): segment id per (user, cycle) then time
+        seg_keys = (owner << _DAY_BITS) | history.fb_cycle
+        self._seg_values, seg_ids = np.unique(seg_keys, return_inverse=True)
+        order = np.lexsort((time, seg_ids))
+        self._seg_fb_keys = (seg_ids[order].astype(np.int64) << _TIME_BITS) | time[order]
+        self._seg_cum_likes = np.concatenate(([0], np.cumsum(history.fb_like[order].astype(np.int64))))
+        self._sorted["seg"] = (time[order], history.fb_like[order].astype(np.int64))
+
+        # decayed prefix sums are built per (ordering, half-life) on first use
+        self._t0 = int(time.min()) if len(time) else 0
+        self._decay_prefix_cache = {}
+
+    def _decay_prefix(self, kind: str, half_life_days: float):
+        """
+        Prefix sums of exp(rate * (t - t0)) (ratings) and the like-weighted
+        version, so sum(exp(-rate * (end - t))) over a range is
+        exp(-rate * (end - t0)) * (P[hi] - P[lo]). Exact while the history
+        spans fewer than ~1000 half-lives.
+        """
+        key = (kind, half_life_days)
+        if key not in self._decay_prefix_cache:
+            from services.scoring import decay_rate
+
+            t, like = self._sorted[kind]
+            g = np.exp(decay_rate(half_life_days) * (t - self._t0))
+            self._decay_prefix_cache[key] = (
+                np.concatenate(([0.0], np.cumsum(g * like))),
+                np.concatenate(([0.0], np.cumsum(g))),
+            )
+        return self._decay_prefix_cache[key]
+
+    def _decayed(self, kind, lo, hi, end, half_life_days):
+        from services.scoring import decay_rate
+
+        p_likes, p_ratings = self._decay_prefix(kind, half_life_days)
+        scale = np.exp(-decay_rate(half_life_days) * (end - self._t0))
+        return scale * (p_likes[hi] - p_likes[lo]), scale * (p_ratings[hi] - p_ratings[lo])
+
+    def _fb_pos(self, users, t, side):
+        return np.searchsorted(self._fb_keys, (users << _TIME_BITS) | t, side=side)
+
+    def counts(self, users, end, start=None, half_life_days=None) -> dict:
+        """
+        likes / ratings / cycles for users (positions) within [start, end]
+        (epoch seconds; start=None means lifetime). Arguments broadcast, so one
+        user over many timestamps or many users at one timestamp both work.
+        With half_life_days, likes/ratings are decayed sums as of `end`.
+        """
+        users, end = np.broadcast_arrays(np.asarray(users, dtype=np.int64), np.asarray(end, dtype=np.int64))
+        start = np.zeros_like(end) if start is None else np.broadcast_to(np.asarray(start, dtype=np.int64), end.shape)
+        end = np.clip(end, 0, None)
+        start = np.clip(start, 0, None)
+
+        hi = self._fb_pos(users, end, "right")
+        lo = self._fb_pos(users, start, "left")
+        if half_life_days is None:
+            likes = self._cum_likes[hi] - self._cum_likes[lo]
+            ratings = hi - lo
+        else:
+            likes, ratings = self._decayed("fb", lo, hi, end, half_life_days)
+
+        end_day, start_day = end // 86400, start // 86400
+        c_hi = np.searchsorted(self._cycle_keys, (users << _DAY_BITS) | end_day, side="right")
+        c_lo = np.searchsorted(self._cycle_keys, (users << _DAY_BITS) | start_day, side="left")
+
+        return {"likes": likes, "ratings": ratings, "cycles": c_hi - c_lo}
+
+    def cycle_counts(self, users, cycle_day, end, half_life_days=None) -> dict:
+        """
+        Feedback received on the users' submissions from one cycle (epoch day),
+        counted up to `end`; cycles is 1 where the user submitted that cycle.
+        """
+        users, cycle_day, end = np.broadcast_arrays(
+            np.asarray(users, dtype=np.int64), np.asarray(cycle_day, dtype=np.int64), np.asarray(end, dtype=np.int64)
+        )
+        seg_key = (users << _DAY_BITS) | cycle_day
+        seg = np.searchsorted(self._seg_values, seg_key)
+        found = (seg < len(self._seg_values)) & (self._seg_values[np.minimum(seg, len(self._seg_values) - 1)] == seg_key)
+
+        hi = np.searchsorted(self._seg_fb_keys, (seg << _TIME_BITS) | np.clip(end, 0, None), side="right")
+        lo = np.searchsorted(self._seg_fb_keys, seg << _TIME_BITS, side="left")
+        if half_life_days is None:
+            likes = np.where(found, self._seg_cum_likes[hi] - self._seg_cum_likes[lo], 0)
+            ratings = np.where(found, hi - lo, 0)
+        else:
+            d_likes, d_ratings = self._decayed("seg", lo, hi, end, half_life_days)
+            likes, ratings = np.where(found, d_likes, 0.0), np.where(found, d_ratings, 0.0)
+
+        k = np.searchsorted(self._cycle_keys, seg_key)
+        submitted = (k < len(self._cycle_keys)) & (self._cycle_keys[np.minimum(k, len(self._cycle_keys) - 1)] == seg_key)
+
+        return {"likes": likes, "ratings": ratings, "cycles": submitted.astype(np.int64)}
+
+
+def parse_window(window: str, at) -> tuple[str, datetime | None, datetime]:
+    """
+    Window label -> (label, start, end) as stored on DropCred rows.
+      "lifetime"           everything up to `at`
+      "90d" / "<N>d"       rolling N days ending at `at`
+      "cycle_YYYY-MM-DD"   feedback on that cycle's submissions, up to `at`
+                           (start/end are the cycle day boundaries in UTC)
+    """
+    if window in (None, "lifetime"):
+        return "lifetime", None, at
+    if window.endswith("d") and window[:-1].isdigit():
+        return window, at - timedelta(days=int(window[:-1])), at
+    if window.startswith("cycle_"):
+        day = date.fromisoformat(window[len("cycle_"):])
+        start = datetime.combine(day, datetime.min.time())
+        if at.tzinfo is not None:
+            start = pytz.UTC.localize(start)
+        return window, start, start + timedelta(days=1)
+    raise ValueError(f"Unsupported window: {window}")
+
+
+def window_inputs(index: CumulativeIndex, users, at, window: str = "lifetime", half_life_days=None) -> dict:
+    """Score inputs for user positions as of `at` over `window` (see parse_window)."""
+    label, start, _ = parse_window(window, at)
+    end_s = to_epoch_seconds(at)
+    if label.startswith("cycle_"):
+        return index.cycle_counts(users, to_epoch_seconds(start) // 86400, end_s, half_life_days=half_life_days)
+    start_s = None if start is None else to_epoch_seconds(start)
+    return index.counts(users, end_s, start_s, half_life_days=half_life_days)
+
+
+def score_as_of(user_id: int, at, window: str = "lifetime", version: int = 4,
+                index: CumulativeIndex | None = None) -> dict:
+    """
+    One user's Drop Cred as of `at` over `window`, in the same dict shape as
+    services.scoring.compute_drop_cred plus window_label/window_start/window_end.
+    Pass a prebuilt `index` when asking for many points.
+    """
+    return score_series(user_id, [at], window=window, version=version, index=index)[0]
+
+
+def score_series(user_id: int, times, window: str = "lifetime", version: int = 4,
+                 index: CumulativeIndex | None = None) -> list[dict]:
+    """Drop Cred for one user at each timestamp in `times` (e.g. a history chart)."""
+    from services.scoring import score_formulas, decay_half_life
+
+    if version not in score_formulas:
+        raise ValueError(f"Unsupported scoring version: {version}")
+    formula, params = score_formulas[version]
+    half_life = decay_half_life(version)
+    index = index or CumulativeIndex(load_history())
+
+    pos = index.history.index_of(user_id)
+    out = []
+    for at in times:
+        label, start, end = parse_window(window, at)
+        extra = {}
+        if pos is None:
+            likes = ratings = cycles = 0
+            score_likes = score_ratings = 0
+        else:
+            inputs = window_inputs(index, pos, at, window)
+            likes, ratings, cycles = (int(inputs[k]) for k in ("likes", "ratings", "cycles"))
+            score_likes, score_ratings = likes, ratings
+            if half_life is not None:
+                decayed = window_inputs(index, pos, at, window, half_life_days=half_life)
+                score_likes, score_ratings = float(decayed["likes"]), float(decayed["ratings"])
+                extra = {"decayed_likes": round(score_likes, 4), "decayed_ratings": round(score_ratings, 4)}
+        score = formula(score_likes, score_ratings, cycles, **params)
+        out.append({
+            "total_likes": likes,
+            "total_dislikes": max(ratings - likes, 0),
+            "total_possible": ratings,
+            "drop_cred_score": float(score),
+            "score_version": version,
+            "params": {**params, "cycles": cycles, **extra},
+            "window_label": label,
+            "window_start": start,
+            "window_end": end,
+        })
+    return out
+
+
+def scores_as_of(at, window: str = "lifetime", version: int = 4,
+                 index: CumulativeIndex | None = None) -> dict:
+    """
+    Every user's score as of `at` in one vectorized lookup (for backfills).
+    Returns {"user_ids", "likes", "ratings", "cycles", "scores"} arrays.
+    """
+    from services.scoring import score_formulas, decay_half_life
+
+    if version not in score_formulas:
+        raise ValueError(f"Unsupported scoring version: {version}")
+    formula, params = score_formulas[version]
+    index = index or CumulativeIndex(load_history())
+
+    users = np.arange(index.history.n_users)
+    inputs = window_inputs(index, users, at, window)
+    half_life = decay_half_life(version)
+    scored = inputs if half_life is None else window_inputs(index, users, at, window, half_life_days=half_life)
+    scores = formula(scored["likes"], scored["ratings"], inputs["cycles"], **params)
+    return {"user_ids": index.history.user_ids, **inputs, "scores": np.broadcast_to(scores, users.shape)}
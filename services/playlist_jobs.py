@@ -0,0 +1,141 @@
+# services/playlist_jobs.py
+#
+# "Create & Open Playlist" as a queued job: the route records a
+# playlist_jobs row and returns its id straight away; a small per-process
+# thread pool does the Spotify calls (services/playlists.sync_user_playlist)
+# and the page polls job_status() until the job is done or failed.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytz
+from flask import current_app
+
+from services.playlists import sync_user_playlist
+from services.tokens import get_access_token
+from utils.helpers import TESTING_MODE
+from utils.spotify_auth import spotify_client
+from utils.spotify_scheduler import RateLimited
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+JOB_WORKERS = int(os.getenv("PLAYLIST_JOB_WORKERS", "4"))   # 0 runs jobs inline (local dev)
+STALE_AFTER = timedelta(minutes=10)                         # queued/running longer than this = lost (worker restarted)
+ACTIVE = ("queued", "running")
+
+_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="playlist-job") if JOB_WORKERS else None
+
+
+def _aware_utc(ts):
+    return pytz.UTC.localize(ts) if ts.tzinfo is None else ts.astimezone(pytz.UTC)
+
+
+def _is_stale(job, now) -> bool:
+    return job.status in ACTIVE and now - _aware_utc(job.created_at) > STALE_AFTER
+
+
+# --- Enqueue (request path) --------------------------------------------------
+def enqueue_playlist_job(user, circle, submissions: list[tuple[int, str]], description: str):
+    """
+    Queue a playlist sync for user + circle and return its PlaylistJob.
+    A job already queued/running for the same pair is returned instead of
+    starting another one (double clicks, two tabs).
+    """
+    from models import db, PlaylistJob, utcnow
+
+    now = utcnow()
+    active = (PlaylistJob.query
+              .filter_by(user_id=user.id, circle_id=circle.id)
+              .filter(PlaylistJob.status.in_(ACTIVE))
+              .order_by(PlaylistJob.id.desc())
+              .first())
+    if active is not None and not _is_stale(active, now):
+        return active
+
+    job = PlaylistJob(user_id=user.id, circle_id=circle.id, status="queued", created_at=now)
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    if _pool is None:
+        run_playlist_job(app, job.id, submissions, description)
+        db.session.refresh(job)
+    else:
+        _pool.submit(run_playlist_job, app, job.id, submissions, description)
+    return job
+
+
+# --- Worker ------------------------------------------------------------------
+def _finish(job, status: str, **fields) -> None:
+    from models import utcnow
+
+    job.status = status
+    job.finished_at = utcnow()
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def run_playlist_job(app, job_id: int, submissions: list[tuple[int, str]], description: str) -> None:
+    """Run one job in its own app context (worker thread); never raises."""
+    from models import db, PlaylistJob, User, SoundCircle, utcnow
+
+    with app.app_context():
+        job = db.session.get(PlaylistJob, job_id)
+        if job is None:
+            return
+        job.status = "running"
+        job.started_at = utcnow()
+        db.session.commit()
+
+        try:
+            user = db.session.get(User, job.user_id)
+            circle = db.session.get(SoundCircle, job.circle_id)
+            token = get_access_token(job.user_id)   # users row, refreshed if needed
+            if user is None or circle is None or not token:
+                raise LookupError("user, circle or Spotify token missing")
+
+            result = sync_user_playlist(spotify_client(token), user, circle, submissions, description)
+            playlist_id = result["playlist_id"]
+            _finish(job, "done", result={
+                "playlist_id": playlist_id,
+                "playlist_uri": f"spotify://playlist/{playlist_id}",
+                "playlist_url": result["playlist_url"],
+                "message": (
+                    "✅ Playlist created and filled!"
+                    if result["created"] else
+                    f"✅ Added {result['added']} new vibe(s) to your existing playlist!"
+                ),
+            })
+        except RateLimited as e:
+            db.session.rollback()
+            wait = int(e.retry_after + 0.999)
+            _finish(job, "failed", retry_after=wait,
+                    error=f"Spotify is busy right now. Please try again in {wait} second(s).")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning("Playlist job %s failed: %s", job_id, e)
+            _finish(job, "failed", error="Failed to create/update playlist. Try logging out and back in.")
+        finally:
+            db.session.commit()
+            if TESTING_MODE:
+                print(f"[PLAYLIST JOB] {job_id} -> {job.status}")
+            db.session.remove()
+
+
+# --- Status (polling) --------------------------------------------------------
+def job_status(job) -> dict:
+    """JSON-able status for the polling endpoint."""
+    from models import utcnow
+
+    if _is_stale(job, utcnow()):
+        return {"job_id": job.id, "status": "failed",
+                "error": "Playlist job was interrupted. Please try again."}
+
+    out = {"job_id": job.id, "status": job.status}
+    if job.status == "done":
+        out.update(job.result or {})
+    elif job.status == "failed":
+        out["error"] = job.error
+        if job.retry_after:
+            out["retry_after"] = job.retry_after
+    return out
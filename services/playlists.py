@@ -0,0 +1,310 @@
+# services/playlists.py
+#
+# Per-user "VibeDrop - <circle>" playlists. The playlist id is remembered in
+# circle_playlists after the first sync, so the usual path never scans the
+# user's Spotify library; scanning by name is only the fallback.
+# circle_playlist_items records which submissions were already pushed, and
+# snapshot_id what the playlist looked like after our last write, so a sync
+# adds only the delta and re-reads the playlist only if someone else edited it.
+#
+# Circles in shared mode (sound_circles.shared_playlist) have one collaborative
+# playlist instead: the creator's row above, synced once per cycle close by
+# `flask sync-shared-playlists`; members only follow it.
+
+from datetime import timedelta
+
+import pytz
+from spotipy.exceptions import SpotifyException
+from sqlalchemy.exc import IntegrityError
+
+from services.tokens import get_access_token
+from utils.helpers import TESTING_MODE
+from utils.spotify_auth import spotify_client
+from utils.spotify_scheduler import BACKGROUND
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+VERIFY_EVERY = timedelta(minutes=10)   # skip the existence check if Spotify confirmed it this recently
+ADD_ITEMS_PER_CALL = 100               # Spotify's add-items limit
+PLAYLISTS_PER_PAGE = 50
+ITEMS_PER_PAGE = 100
+
+
+def _aware_utc(ts):
+    # SQLite hands back naive UTC, Postgres an aware value
+    return pytz.UTC.localize(ts) if ts.tzinfo is None else ts.astimezone(pytz.UTC)
+
+
+def playlist_name(circle) -> str:
+    return f"VibeDrop - {circle.circle_name}"
+
+
+# --- Discovery ---------------------------------------------------------------
+def _still_followed(sp, playlist_id: str, spotify_user_id: str) -> bool:
+    # "deleting" a playlist in Spotify only unfollows it, so ask whether the owner still follows it
+    try:
+        return bool((sp.playlist_is_following(playlist_id, [spotify_user_id]) or [False])[0])
+    except SpotifyException as e:
+        if e.http_status in (403, 404):
+            return False
+        raise
+
+
+def _scan_by_name(sp, name: str):
+    # pages in order, stopping at the first match (usually page one)
+    page = sp.current_user_playlists(limit=PLAYLISTS_PER_PAGE)
+    while page:
+        match = next((p for p in page.get("items") or [] if p and p.get("name") == name), None)
+        if match is not None or not page.get("next"):
+            return match
+        page = sp.next(page)
+    return None
+
+
+def _playlist_track_ids(sp, playlist_id: str) -> set:
+    # track ids currently in the playlist (all pages)
+    ids = set()
+    page = sp.playlist_items(playlist_id, fields="items(track(id)),next", limit=ITEMS_PER_PAGE)
+    while page:
+        ids.update((it.get("track") or {}).get("id") for it in page.get("items") or [])
+        if not page.get("next"):
+            break
+        page = sp.next(page)
+    return ids - {None}
+
+
+def get_user_playlist(sp, user, circle, description: str, collaborative: bool = False):
+    """
+    (CirclePlaylist row, created) for this user + circle. Order:
+      1. stored id, trusted if verified within VERIFY_EVERY (0 calls)
+         or re-verified with one followers/contains call
+      2. fallback: scan the user's playlists by name, stopping at the first match
+      3. create it (collaborative playlists must be private)
+    Commits the mapping.
+    """
+    from models import db, CirclePlaylist, utcnow
+
+    row = CirclePlaylist.query.filter_by(user_id=user.id, circle_id=circle.id).first()
+    now = utcnow()
+    if row is not None:
+        if row.verified_at is not None and now - _aware_utc(row.verified_at) < VERIFY_EVERY:
+            return row, False
+        if _still_followed(sp, row.spotify_playlist_id, user.spotify_id):
+            row.verified_at = now
+            db.session.commit()
+            return row, False
+        if TESTING_MODE:
+            print(f"[PLAYLISTS] stored playlist {row.spotify_playlist_id} gone for user_id={user.id}")
+
+    created = False
+    playlist = _scan_by_name(sp, playlist_name(circle))
+    if playlist is None:
+        playlist = sp.user_playlist_create(
+            user=user.spotify_id,
+            name=playlist_name(circle),
+            public=False,
+            collaborative=collaborative,
+            description=description,
+        )
+        created = True
+
+    if row is None:
+        row = CirclePlaylist(user_id=user.id, circle_id=circle.id, created_at=now)
+        db.session.add(row)
+    if row.spotify_playlist_id != playlist["id"]:
+        # different playlist: nothing in it was pushed by us yet
+        row.items.clear()
+        row.snapshot_id = playlist.get("snapshot_id") if created else None
+    row.spotify_playlist_id = playlist["id"]
+    row.playlist_url = (playlist.get("external_urls") or {}).get("spotify")
+    row.verified_at = now
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent sync (double click) stored the mapping first; use theirs
+        db.session.rollback()
+        row = CirclePlaylist.query.filter_by(user_id=user.id, circle_id=circle.id).one()
+    return row, created
+
+
+# --- Sync --------------------------------------------------------------------
+def sync_user_playlist(sp, user, circle, submissions: list[tuple[int, str]], description: str,
+                       collaborative: bool = False) -> dict:
+    """
+    Make sure the user's circle playlist exists and contains the tracks of
+    `submissions` ((submission_id, spotify_track_id) pairs). Only submissions
+    never pushed before are considered, and each is claimed in
+    circle_playlist_items before the Spotify write so overlapping syncs don't
+    add it twice; the playlist's items are re-read only when its snapshot_id
+    moved since our last write (edited outside VibeDrop).
+    Returns {"playlist_id", "playlist_url", "created", "added"}.
+    """
+    from models import db, CirclePlaylistItem, utcnow
+
+    row, created = get_user_playlist(sp, user, circle, description, collaborative)
+    playlist_id = row.spotify_playlist_id
+
+    synced = dict(
+        db.session.query(CirclePlaylistItem.submission_id, CirclePlaylistItem.spotify_track_id)
+        .filter(CirclePlaylistItem.circle_playlist_id == row.id)
+    )
+    pending = [(sid, tid) for sid, tid in dict(submissions).items() if tid and sid not in synced]
+    result = {
+        "playlist_id": playlist_id,
+        "playlist_url": row.playlist_url or f"https://open.spotify.com/playlist/{playlist_id}",
+        "created": created,
+        "added": 0,
+    }
+    if not pending:
+        return result   # nothing new: no Spotify calls at all
+
+    # claim the pending rows before touching Spotify: an overlapping sync (double click)
+    # hits the unique constraint here and skips them, so each track is added once
+    now = utcnow()
+    claimed = []
+    for sid, tid in pending:
+        try:
+            with db.session.begin_nested():
+                db.session.add(CirclePlaylistItem(circle_playlist_id=row.id, submission_id=sid,
+                                                  spotify_track_id=tid, added_at=now))
+        except IntegrityError:
+            continue
+        claimed.append((sid, tid))
+    db.session.commit()
+    if not claimed:
+        return result
+
+    try:
+        snapshot_id = row.snapshot_id
+        if created:
+            present = set()
+        else:
+            remote_snapshot = (sp.playlist(playlist_id, fields="snapshot_id") or {}).get("snapshot_id")
+            if snapshot_id and remote_snapshot == snapshot_id:
+                present = set(synced.values())      # unchanged since our last write
+            else:
+                present = _playlist_track_ids(sp, playlist_id)
+                if TESTING_MODE:
+                    print(f"[PLAYLISTS] {playlist_id} changed outside VibeDrop; re-read {len(present)} track(s)")
+            snapshot_id = remote_snapshot
+
+        new_uris = [f"spotify:track:{tid}" for tid in dict.fromkeys(tid for _, tid in claimed) if tid not in present]
+        for i in range(0, len(new_uris), ADD_ITEMS_PER_CALL):
+            resp = sp.playlist_add_items(playlist_id=playlist_id, items=new_uris[i:i + ADD_ITEMS_PER_CALL])
+            snapshot_id = (resp or {}).get("snapshot_id") or snapshot_id
+    except Exception:
+        # release the claim so the next sync retries these submissions
+        db.session.rollback()
+        (CirclePlaylistItem.query
+         .filter(CirclePlaylistItem.circle_playlist_id == row.id)
+         .filter(CirclePlaylistItem.submission_id.in_([sid for sid, _ in claimed]))
+         .delete(synchronize_session=False))
+        db.session.commit()
+        raise
+
+    row.snapshot_id = snapshot_id
+    db.session.commit()
+
+    result["added"] = len(new_uris)
+    return result
+
+
+# --- Shared circle playlist ---------------------------------------------------
+def sync_shared_playlist(circle, submissions: list[tuple[int, str]], cycle_end, description: str) -> dict | None:
+    """
+    Cycle-close sync for a circle in shared mode: push the closed cycle's
+    submissions into the creator's collaborative playlist with the creator's
+    token. The cycle (cycle_end = the drop that closed it) is claimed with a
+    conditional UPDATE first, so overlapping cron runs sync it exactly once.
+    Returns the sync_user_playlist result, or None if there was nothing to do.
+    """
+    from models import db, SoundCircle, User
+
+    if not circle.shared_playlist or circle.creator_id is None:
+        return None
+    previous = circle.shared_synced_through   # saved now: the rollback below would reload the claimed value
+    first_sync = previous is None
+    claimed = (db.session.query(SoundCircle)
+               .filter(SoundCircle.id == circle.id)
+               .filter((SoundCircle.shared_synced_through.is_(None)) | (SoundCircle.shared_synced_through < cycle_end))
+               .update({SoundCircle.shared_synced_through: cycle_end}, synchronize_session=False))
+    db.session.commit()
+    if not claimed:
+        return None
+
+    try:
+        creator = db.session.get(User, circle.creator_id)
+        token = get_access_token(circle.creator_id)
+        if creator is None or not token:
+            raise LookupError("circle creator or Spotify token missing")
+        sp = spotify_client(token, priority=BACKGROUND)
+        result = sync_user_playlist(sp, creator, circle, submissions, description, collaborative=True)
+        if first_sync and not result["created"]:
+            # the creator's existing circle playlist becomes the shared one
+            sp.playlist_change_details(result["playlist_id"], public=False, collaborative=True)
+    except Exception:
+        # release the claim so the next run retries this cycle
+        db.session.rollback()
+        (db.session.query(SoundCircle)
+         .filter(SoundCircle.id == circle.id)
+         .update({SoundCircle.shared_synced_through: previous}, synchronize_session=False))
+        db.session.commit()
+        raise
+
+    if TESTING_MODE:
+        print(f"[PLAYLISTS] shared playlist for circle_id={circle.id}: +{result['added']} through {cycle_end}")
+    return result
+
+
+def follow_shared_playlist(sp, user, circle) -> dict | None:
+    """
+    A member's "open playlist" in shared mode: follow the circle's playlist
+    once (one Spotify call, remembered in the member's circle_playlists row)
+    and return {"playlist_id", "playlist_url", "created", "added"}.
+    None until the first cycle-close sync has built the playlist.
+    """
+    from models import db, CirclePlaylist, utcnow
+
+    shared = CirclePlaylist.query.filter_by(user_id=circle.creator_id, circle_id=circle.id).first()
+    if shared is None or circle.shared_synced_through is None:
+        return None
+
+    if user.id != circle.creator_id:
+        row = CirclePlaylist.query.filter_by(user_id=user.id, circle_id=circle.id).first()
+        if row is None or row.spotify_playlist_id != shared.spotify_playlist_id:
+            sp.current_user_follow_playlist(shared.spotify_playlist_id)
+            now = utcnow()
+            if row is None:
+                row = CirclePlaylist(user_id=user.id, circle_id=circle.id, created_at=now)
+                db.session.add(row)
+            row.items.clear()   # the circle's sync owns the items; this row only records the follow
+            row.snapshot_id = None
+            row.spotify_playlist_id = shared.spotify_playlist_id
+            row.playlist_url = shared.playlist_url
+            row.verified_at = now
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()   # a concurrent click recorded the follow first
+
+    return {
+        "playlist_id": shared.spotify_playlist_id,
+        "playlist_url": shared.playlist_url or f"https://open.spotify.com/playlist/{shared.spotify_playlist_id}",
+        "created": False,
+        "added": 0,
+    }
+
+
+def leave_shared_mode(circle) -> None:
+    """
+    Shared mode switched off: forget the members' follow rows (so their next
+    sync builds a playlist of their own) and the sync marker. Caller commits.
+    """
+    from models import db, CirclePlaylist
+
+    shared = CirclePlaylist.query.filter_by(user_id=circle.creator_id, circle_id=circle.id).first()
+    if shared is not None:
+        for row in (CirclePlaylist.query
+                    .filter_by(circle_id=circle.id, spotify_playlist_id=shared.spotify_playlist_id)
+                    .filter(CirclePlaylist.user_id != shared.user_id)):
+            db.session.delete(row)
+    circle.shared_synced_through = None
@@ -0,0 +1,121 @@
+# services/schedule.py
+#
+# Drop schedule math for circles. A circle drops at its drop_time on the
+# US/Eastern wall clock (so DST moves the UTC instant, not the local hour):
+#   daily     every day
+#   weekly    every drop_day1
+#   biweekly  twice a week, on drop_day1 and drop_day2
+# Next / most recent / second most recent drops are computed arithmetically
+# from the weekday offsets (no scanning of candidate days) and memoized per
+# circle until the next drop. edit_circle calls invalidate_schedule(); the
+# memo is also keyed on the schedule fields, so another worker's stale entry
+# is never served after an edit.
+
+from datetime import datetime, timedelta
+
+import pytz
+
+from utils.cache import LRUCache
+
+TZ_EST = pytz.timezone("US/Eastern")
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+SCHEDULE_CACHE_SIZE = 4096
+
+_window_cache = LRUCache(maxsize=SCHEDULE_CACHE_SIZE)   # circle_id -> (schedule key, window)
+
+
+def _weekday(name) -> int | None:
+    try:
+        return WEEKDAYS.index((name or "").strip().capitalize())
+    except ValueError:
+        return None
+
+
+def drop_weekdays(circle) -> tuple[int, ...] | None:
+    """Sorted weekdays (Monday=0) the circle drops on, or None if the schedule is incomplete."""
+    frequency = (circle.drop_frequency or "").lower()
+    if frequency == "daily":
+        return tuple(range(7))
+    if frequency == "weekly":
+        days = [_weekday(circle.drop_day1)]
+    elif frequency == "biweekly":
+        days = [_weekday(circle.drop_day1), _weekday(circle.drop_day2)]
+    else:
+        return None
+    if None in days:
+        return None
+    return tuple(sorted(set(days)))
+
+
+def _aware_utc(ts):
+    # SQLite hands back naive UTC, Postgres an aware value
+    return pytz.UTC.localize(ts) if ts.tzinfo is None else ts.astimezone(pytz.UTC)
+
+
+def schedule_key(circle) -> tuple:
+    """
+    What the drop times depend on: frequency, days and the Eastern wall-clock
+    drop time (drop_time's date is whatever day it was saved on and is ignored).
+    """
+    return (circle.drop_frequency, circle.drop_day1, circle.drop_day2,
+            _aware_utc(circle.drop_time).astimezone(TZ_EST).time() if circle.drop_time else None)
+
+
+def _drop_at(day, drop_time) -> datetime:
+    return TZ_EST.localize(datetime.combine(day, drop_time)).astimezone(pytz.UTC)
+
+
+def compute_cycle_window(circle, now: datetime | None = None) -> tuple[datetime, datetime, datetime] | None:
+    """
+    (next_drop, most_recent_drop, second_most_recent_drop) as aware UTC
+    datetimes for `now` (default: current time); next_drop is strictly after
+    now. None if the circle's schedule is incomplete. Not memoized.
+    """
+    days = drop_weekdays(circle)
+    if not days or circle.drop_time is None:
+        return None
+
+    now = (now or datetime.now(pytz.UTC)).astimezone(TZ_EST)
+    drop_time = _aware_utc(circle.drop_time).astimezone(TZ_EST).time()
+    today = now.date()
+
+    # next drop: the nearest drop weekday from today (a week out if today's drop already passed)
+    def offset(weekday):
+        days_ahead = (weekday - today.weekday()) % 7
+        if days_ahead == 0 and _drop_at(today, drop_time) <= now:
+            days_ahead = 7
+        return days_ahead
+
+    next_day = today + timedelta(days=min(offset(d) for d in days))
+
+    # earlier drops: step back to the previous drop weekday (gap of 7 when there is only one)
+    def previous(day):
+        i = days.index(day.weekday())
+        gap = (days[i] - days[i - 1]) % 7 or 7
+        return day - timedelta(days=gap)
+
+    last_day = previous(next_day)
+    return _drop_at(next_day, drop_time), _drop_at(last_day, drop_time), _drop_at(previous(last_day), drop_time)
+
+
+def get_cycle_window(circle) -> tuple[datetime, datetime, datetime] | None:
+    """compute_cycle_window(circle) for now, served from the memo until the next drop passes."""
+    now = datetime.now(pytz.UTC)
+    key = schedule_key(circle)
+    cached = _window_cache.get(circle.id)
+    if cached is not None:
+        cached_key, window = cached
+        if cached_key == key and (window is None or now < window[0]):
+            return window
+
+    window = compute_cycle_window(circle, now)
+    _window_cache.set(circle.id, (key, window))
+    return window
+
+
+def invalidate_schedule(circle_id: int) -> None:
+    _window_cache.pop(circle_id)
+
+
+def schedule_cache_stats() -> dict:
+    return _window_cache.stats()
@@ -1,10 +1,16 @@
 # services/scoring.py
 
+import copy
+import math
+import time
+
+import numpy as np
 from sqlalchemy import func  # fine to keep
 # ⛔️ Do NOT import models at module top to avoid circulars.
 # from models import db, Submission, SongFeedback, CircleMembership, DropCred, User
 
 
+from utils.cache import LRUCache
 from utils.helpers import TESTING_MODE
 
 # --- Config ------------------------------------------------------------------
@@ -12,11 +18,20 @@ SCORING_VERSION = 4  # Current production logic
 
 
 # --- Scoring Dispatcher ------------------------------------------------------
-def compute_drop_cred_scores():
+def compute_drop_cred_scores(per_circle: bool = False, workers: int | None = None):
     """
     Entry point to recompute Drop Cred scores for all users in all circles.
     Selects version-specific function based on SCORING_VERSION.
+    per_circle=True uses the circle-partitioned engine (services/circle_scoring.py),
+    which also writes one score per (user, circle), spread over `workers` processes.
     """
+    if per_circle:
+        from services.circle_scoring import circle_scoring_registry
+        scoring_fn = circle_scoring_registry.get(SCORING_VERSION)
+        if not scoring_fn:
+            raise ValueError(f"Unsupported per-circle scoring version: {SCORING_VERSION}")
+        return scoring_fn(workers=workers)
+
     scoring_fn = scoring_registry.get(SCORING_VERSION)
     if scoring_fn:
         scoring_fn()
@@ -25,68 +40,279 @@ def compute_drop_cred_scores():
 
 
 # --- Version 4: Bayesian Smoothing + Participation Bonus ---------------------
+V4_PARAMS = {
+    "alpha": 5,   # Prior strength
+    "mu": 0.7,    # Prior mean like rate
+    "beta": 3,    # Participation bonus multiplier
+}
+
+
+def v4_formula(likes, ratings, cycles, circle_members=None, *, alpha, mu, beta):
+    """
+    Pure v4 formula shared by the batch, single-user and backtest paths.
+    circle_members=None skips the solo-circle rule (single-user path is cross-circle).
+    Scalars in -> float out; NumPy arrays broadcast (e.g. a (G, 1) param grid
+    against (U,) user totals gives a (G, U) score matrix).
+    """
+    # Bayesian Smoothing (scaled to 0–10)
+    smoothed = ((likes + alpha * mu) / (ratings + alpha)) * 10
+
+    # Participation bonus: capped at 1*beta when active every week
+    participation_bonus = beta * np.minimum(np.asarray(cycles) / 10, 1)
+    if circle_members is not None:
+        participation_bonus = np.where(np.asarray(circle_members) == 1, 0, participation_bonus)
+
+    score = np.round(smoothed + participation_bonus, 2)
+    return float(score) if np.ndim(score) == 0 else score
+
+
+def load_v4_aggregates() -> dict:
+    """
+    Set-based inputs for v4: one grouped query per quantity instead of a
+    per-user / per-submission walk. Scoped like the original loop: each user's
+    first CircleMembership decides the circle they're scored in.
+    Returns {user_id: {"circle_id", "circle_members", "likes", "ratings", "cycles"}}.
+    """
+    from models import db, Submission, SongFeedback, CircleMembership
+    from sqlalchemy import case
+
+    # 1) first membership per user (lowest membership id)
+    first_ids = (
+        db.session.query(func.min(CircleMembership.id).label("mid"))
+        .group_by(CircleMembership.user_id)
+        .subquery()
+    )
+    first_rows = (
+        db.session.query(CircleMembership.user_id, CircleMembership.circle_id)
+        .join(first_ids, CircleMembership.id == first_ids.c.mid)
+        .all()
+    )
+
+    # 2) circle sizes
+    sizes = dict(
+        db.session.query(CircleMembership.circle_id, func.count(CircleMembership.id))
+        .group_by(CircleMembership.circle_id)
+        .all()
+    )
+
+    # 3) distinct cycles per (user, circle)
+    cycles = {
+        (uid, cid): n
+        for uid, cid, n in (
+            db.session.query(
+                Submission.user_id,
+                Submission.circle_id,
+                func.count(func.distinct(Submission.cycle_date)),
+            )
+            .group_by(Submission.user_id, Submission.circle_id)
+            .all()
+        )
+    }
+
+    # 4) likes / ratings received per (submitter, circle)
+    feedback = {
+        (uid, cid): (likes or 0, ratings or 0)
+        for uid, cid, likes, ratings in (
+            db.session.query(
+                Submission.user_id,
+                Submission.circle_id,
+                func.sum(case((SongFeedback.feedback == "like", 1), else_=0)),
+                func.count(SongFeedback.id),
+            )
+            .join(SongFeedback, SongFeedback.song_id == Submission.id)
+            .group_by(Submission.user_id, Submission.circle_id)
+            .all()
+        )
+    }
+
+    aggregates = {}
+    for user_id, circle_id in first_rows:
+        likes, ratings = feedback.get((user_id, circle_id), (0, 0))
+        aggregates[user_id] = {
+            "circle_id": circle_id,
+            "circle_members": int(sizes.get(circle_id, 0)),
+            "likes": int(likes),
+            "ratings": int(ratings),
+            "cycles": int(cycles.get((user_id, circle_id), 0)),
+        }
+    return aggregates
+
+
+def bulk_upsert_drop_creds(rows: list[dict], score_version: int, window_label: str = "lifetime") -> None:
+    """
+    Write many DropCred rows in one pass: the latest existing live row per
+    (user, circle) for (score_version, window_label) is updated in place,
+    everyone else gets an insert. Snapshot rows (window_end set, see
+    services/snapshots.py) are history and never matched. Each row dict needs user_id, total_likes,
+    total_dislikes, total_possible, drop_cred_score and params; an optional
+    circle_id scopes it to one circle (absent/None = cross-circle). Does not commit.
+    """
+    from models import db, DropCred
+    from sqlalchemy import insert, update, or_
+    from datetime import datetime
+
+    if not rows:
+        return
+
+    label_filter = (
+        or_(DropCred.window_label.is_(None), DropCred.window_label == "lifetime")
+        if window_label == "lifetime"
+        else DropCred.window_label == window_label
+    )
+    existing = {
+        (uid, cid): row_id
+        for uid, cid, row_id in (
+            db.session.query(DropCred.user_id, DropCred.circle_id, func.max(DropCred.id))
+            .filter(DropCred.score_version == score_version)
+            .filter(label_filter)
+            .filter(DropCred.window_end.is_(None))   # live rows only
+            .group_by(DropCred.user_id, DropCred.circle_id)
+            .all()
+        )
+    }
+
+    now = datetime.utcnow()
+    updates, inserts = [], []
+    for row in rows:
+        values = dict(row, circle_id=row.get("circle_id"), computed_at=now,
+                      score_version=score_version, window_label=window_label)
+        row_id = existing.get((row["user_id"], values["circle_id"]))
+        if row_id is not None:
+            updates.append(dict(values, id=row_id))
+        else:
+            inserts.append(values)
+
+    if updates:
+        db.session.execute(update(DropCred), updates)  # executemany UPDATE by primary key
+    if inserts:
+        db.session.execute(insert(DropCred).execution_options(render_nulls=True), inserts)
+
+
 def score_v4():
     """
     Version 4 scoring: Bayesian smoothing + participation rate.
     DropCred = BayesianRating * 10 + ParticipationBonus
+
+    Batch engine: a fixed handful of grouped queries plus one bulk upsert,
+    regardless of how many users or submissions there are. Each user is scored
+    in their first circle only, so the row is written for that circle (the same
+    row score_v4_per_circle produces); circle_id NULL stays cross-circle.
     """
     # ✅ Lazy imports to avoid circular import at module load
-    from models import db, Submission, SongFeedback, CircleMembership, DropCred, User
-    from sqlalchemy import func
+    from models import db
 
-    alpha = 5  # Prior strength
-    mu = 0.7   # Prior mean like rate
-    beta = 3   # Participation bonus multiplier
+    params = V4_PARAMS
+    rows = []
+    for user_id, agg in load_v4_aggregates().items():
+        score = v4_formula(agg["likes"], agg["ratings"], agg["cycles"], agg["circle_members"], **params)
 
-    users = User.query.all()
+        if TESTING_MODE:
+            print(f"[SCORING v4] user_id={user_id}: "
+                  f"Likes={agg['likes']}, Rated={agg['ratings']}, Cycles={agg['cycles']}, Score={score}")
+
+        rows.append({
+            "user_id": user_id,
+            "circle_id": agg["circle_id"],
+            "total_likes": agg["likes"],
+            "total_dislikes": max(agg["ratings"] - agg["likes"], 0),
+            "total_possible": agg["ratings"],
+            "drop_cred_score": float(score),
+            "params": {**params, "cycles": agg["cycles"], "circle_members": agg["circle_members"]},
+        })
+
+    bulk_upsert_drop_creds(rows, score_version=4)
+    db.session.commit()
 
-    for user in users:
-        membership = CircleMembership.query.filter_by(user_id=user.id).first()
-        if not membership:
-            continue
 
-        circle_id = membership.circle_id
-        circle_members = CircleMembership.query.filter_by(circle_id=circle_id).count()
+# --- Version 5: Exponentially time-decayed v4 --------------------------------
+V5_PARAMS = {
+    **V4_PARAMS,
+    "half_life_days": 90,   # a like/dislike counts half as much after this many days
+}
 
-        submissions = Submission.query.filter_by(user_id=user.id, circle_id=circle_id).all()
-        num_cycles = len({s.cycle_date for s in submissions})
 
-        total_likes = 0
-        total_ratings = 0
+def decay_rate(half_life_days: float) -> float:
+    """Per-second decay constant for a half-life in days."""
+    return math.log(2) / (half_life_days * 86400)
 
-        for s in submissions:
-            feedbacks = SongFeedback.query.filter_by(song_id=s.id).all()
-            total_likes += sum(1 for f in feedbacks if f.feedback == "like")
-            total_ratings += len(feedbacks)
 
-        # Bayesian Smoothing (scaled to 0–10)
-        smoothed = ((total_likes + alpha * mu) / (total_ratings + alpha)) * 10
+def decay_weights(ages_seconds, half_life_days: float):
+    """exp(-rate * age): weight of a rating `age` seconds old (array-friendly)."""
+    return np.exp(-decay_rate(half_life_days) * np.maximum(ages_seconds, 0))
 
-        # Participation bonus: capped at 1*beta when active every week
-        participation_bonus = 0 if circle_members == 1 else beta * min(num_cycles / 10, 1)
 
-        score = round(smoothed + participation_bonus, 2)
+def v5_formula(likes, ratings, cycles, circle_members=None, *, alpha, mu, beta, half_life_days):
+    """
+    v4 applied to *decayed* likes/ratings (each rating weighted by
+    0.5 ** (age / half_life_days)). Callers pass the decayed sums; half_life_days
+    tells them how to build those (see decay_half_life).
+    """
+    return v4_formula(likes, ratings, cycles, circle_members, alpha=alpha, mu=mu, beta=beta)
 
-        if TESTING_MODE:
-            print(f"[SCORING v4] {user.vibedrop_username}: "
-                  f"Likes={total_likes}, Rated={total_ratings}, Cycles={num_cycles}, Score={score}")
 
-        row = DropCred.query.filter_by(user_id=user.id).first()
-        if not row:
-            row = DropCred(user_id=user.id, score=score)
-            db.session.add(row)
-        else:
-            row.score = score
+def score_v5():
+    """
+    Version 5 scoring: v4 on exponentially decayed likes/ratings, recomputed for
+    every user from one load of history. (The dashboard path uses the O(1)
+    state in drop_cred_counters instead.)
+    """
+    from models import db
+    from services.history import load_history
+    from datetime import datetime
+
+    params = V5_PARAMS
+    history = load_history()
+    now = datetime.utcnow()
+    totals = history.totals()
+    decayed = history.totals(half_life_days=params["half_life_days"], at=now)
+
+    rows = []
+    for i, user_id in enumerate(history.user_ids):
+        d_likes, d_ratings = float(decayed["likes"][i]), float(decayed["ratings"][i])
+        likes, ratings, cycles = int(totals["likes"][i]), int(totals["ratings"][i]), int(totals["cycles"][i])
+        score = v5_formula(d_likes, d_ratings, cycles, **params)
 
+        if TESTING_MODE:
+            print(f"[SCORING v5] user_id={user_id}: DecayedLikes={d_likes:.2f}, "
+                  f"DecayedRated={d_ratings:.2f}, Cycles={cycles}, Score={score}")
+
+        rows.append({
+            "user_id": int(user_id),
+            "total_likes": likes,
+            "total_dislikes": max(ratings - likes, 0),
+            "total_possible": ratings,
+            "drop_cred_score": float(score),
+            "params": {**params, "cycles": cycles,
+                       "decayed_likes": round(d_likes, 4), "decayed_ratings": round(d_ratings, 4)},
+        })
+
+    bulk_upsert_drop_creds(rows, score_version=5)
     db.session.commit()
 
 
 # --- Scoring Version Registry ------------------------------------------------
 scoring_registry = {
     4: score_v4,
+    5: score_v5,
     # Future versions go here
 }
 
+# Pure formula + default params behind each registry entry, for offline
+# evaluation (services/backtest.py) without touching drop_creds.
+score_formulas = {
+    4: (v4_formula, V4_PARAMS),
+    5: (v5_formula, V5_PARAMS),
+}
+
+
+def decay_half_life(version: int, params: dict | None = None) -> float | None:
+    """
+    Half-life (days) a version's likes/ratings inputs are decayed with, or None
+    when the formula takes plain counts.
+    """
+    _, defaults = score_formulas[version]
+    return (params or defaults).get("half_life_days", defaults.get("half_life_days"))
+
 
 # --- Back-compat shims (keep app.py unchanged) -------------------------------
 # def compute_drop_cred(user_id: int | None = None, score_version: int | None = None) -> dict:
@@ -98,71 +324,90 @@ scoring_registry = {
 #     compute_drop_cred_scores()
 #     return {"version": SCORING_VERSION, "recomputed": True}
 
-def snapshot_user_all_versions(user_id: int) -> None:
+def snapshot_user_all_versions(user_id: int, versions=None, replace: bool = True, commit: bool = True) -> int:
     """
-    Historical API used by app.py. If you previously snapshot per-version scores,
-    wire that logic here. For now we recompute with the current version.
+    Historical API used by app.py: write lifetime / 90d / per-cycle DropCred
+    snapshots for one user and each registered version in `versions`
+    (default: all). Thin wrapper over the streaming pipeline in services/snapshots.py.
     """
-    compute_drop_cred_scores()
+    from services.snapshots import rebuild_drop_cred_history
+
+    return rebuild_drop_cred_history(versions=versions, user_ids=[user_id], replace=replace, commit=commit)
+
+
+
+# --- Single-user result cache ------------------------------------------------
+# (user_id, version) -> (watermark, result). The watermark is the user's
+# drop_cred_counters.updated_at, which every feedback/submission write bumps
+# in the same transaction, so a hit is valid across workers and a value cached
+# before a write commits can't outlive it. It comes from the counters row the
+# compute reads anyway: hit or miss, a lookup is one primary-key read.
+SCORE_CACHE_SIZE = 4096
+DECAY_CACHE_SECONDS = 3600   # decayed versions drift with time; re-score at most hourly
+
+_score_cache = LRUCache(maxsize=SCORE_CACHE_SIZE)
 
 
+def _score_watermark(counters: dict, version: int):
+    if decay_half_life(version) is not None:
+        return (counters["updated_at"], int(time.time() // DECAY_CACHE_SECONDS))
+    return counters["updated_at"]
+
+
+def invalidate_drop_cred_cache(user_id: int) -> None:
+    """Forget this worker's cached scores for a user (all versions); frees memory, the watermark keeps hits valid."""
+    for version in score_formulas:
+        _score_cache.pop((user_id, version))
+
+
+def drop_cred_cache_stats() -> dict:
+    return _score_cache.stats()
+
 
 # --- Single-user API kept for app.py -----------------------------------------
 def compute_drop_cred(user_id: int, score_version: int | None = None) -> dict:
     """
     Compute v4 Drop Cred for a single user and return a dict with the fields
     app.py expects (total_likes, total_dislikes, total_possible, drop_cred_score, ...).
+    Served from the watermark cache when the user's counters haven't changed.
     """
+    # lazy import to avoid circular import at module import time
+    from services.counters import get_counters
+
     version = score_version or SCORING_VERSION
     if version == 4:
-        return _compute_drop_cred_v4_single(user_id)
-    raise ValueError(f"Unsupported scoring version: {version}")
+        compute = _compute_drop_cred_v4_single
+    elif version == 5:
+        compute = _compute_drop_cred_v5_single
+    else:
+        raise ValueError(f"Unsupported scoring version: {version}")
 
+    counters = get_counters(user_id)
+    watermark = _score_watermark(counters, version)
+    cached = _score_cache.get((user_id, version))
+    if cached is not None and cached[0] == watermark:
+        return copy.deepcopy(cached[1])
 
-def _compute_drop_cred_v4_single(user_id: int) -> dict:
-    # lazy import to avoid circular import at module import time
-    from models import db, Submission, SongFeedback
-    from sqlalchemy import func
-    
-    # v4 parameters
-    alpha = 5
-    mu = 0.7
-    beta = 3
-
-    # Count all feedback on tracks submitted by this user (across circles)
-    likes_q = (
-        db.session.query(func.count(SongFeedback.id))
-        .join(Submission, SongFeedback.song_id == Submission.id)
-        .filter(Submission.user_id == user_id, SongFeedback.feedback == "like")
-    )
-    total_q = (
-        db.session.query(func.count(SongFeedback.id))
-        .join(Submission, SongFeedback.song_id == Submission.id)
-        .filter(Submission.user_id == user_id)
-    )
+    result = compute(user_id, counters)
+    _score_cache.set((user_id, version), (watermark, copy.deepcopy(result)))
+    return result
 
-    total_likes = likes_q.scalar() or 0
-    total_ratings = total_q.scalar() or 0
-    total_dislikes = max(total_ratings - total_likes, 0)
 
-    # Distinct cycles the user has submitted to
-    cycles = (
-        db.session.query(func.count(func.distinct(Submission.cycle_date)))
-        .filter(Submission.user_id == user_id)
-        .scalar()
-        or 0
-    )
+def _compute_drop_cred_v4_single(user_id: int, counters: dict | None = None) -> dict:
+    # lazy import to avoid circular import at module import time
+    from services.counters import get_counters
 
-    # Bayesian smoothing (like-rate on 0–10)
-    if (total_ratings + alpha) > 0:
-        bayesian = ((total_likes + alpha * mu) / (total_ratings + alpha)) * 10
-    else:
-        bayesian = mu * 10  # no ratings -> prior
+    # v4 parameters
+    alpha, mu, beta = V4_PARAMS["alpha"], V4_PARAMS["mu"], V4_PARAMS["beta"]
 
-    # Participation bonus
-    participation_bonus = beta * min(cycles / 10, 1)
+    # Likes/ratings received (across circles) + distinct cycles, maintained on write
+    counters = counters or get_counters(user_id)
+    total_likes = counters["likes"]
+    total_ratings = counters["ratings"]
+    total_dislikes = max(total_ratings - total_likes, 0)
+    cycles = counters["cycles"]
 
-    score = round(bayesian + participation_bonus, 2)
+    score = v4_formula(total_likes, total_ratings, cycles, alpha=alpha, mu=mu, beta=beta)
 
     return {
         "total_likes": int(total_likes),
@@ -171,4 +416,30 @@ def _compute_drop_cred_v4_single(user_id: int) -> dict:
         "drop_cred_score": float(score),
         "score_version": 4,
         "params": {"alpha": alpha, "mu": mu, "beta": beta, "cycles": int(cycles)},
-    }
\ No newline at end of file
+    }
+
+
+def _compute_drop_cred_v5_single(user_id: int, counters: dict | None = None) -> dict:
+    # lazy import to avoid circular import at module import time
+    from services.counters import get_counters
+
+    params = V5_PARAMS
+
+    # decayed state is rolled forward to "now" on read; no history scan
+    counters = counters or get_counters(user_id)
+    total_likes = counters["likes"]
+    total_ratings = counters["ratings"]
+    cycles = counters["cycles"]
+    d_likes, d_ratings = counters["decayed_likes"], counters["decayed_ratings"]
+
+    score = v5_formula(d_likes, d_ratings, cycles, **params)
+
+    return {
+        "total_likes": int(total_likes),
+        "total_dislikes": int(max(total_ratings - total_likes, 0)),
+        "total_possible": int(total_ratings),
+        "drop_cred_score": float(score),
+        "score_version": 5,
+        "params": {**params, "cycles": int(cycles),
+                   "decayed_likes": round(d_likes, 4), "decayed_ratings": round(d_ratings, 4)},
+    }
@@ -0,0 +1,241 @@
+# services/snapshots.py
+#
+# Rebuild windowed DropCred history (lifetime, rolling N-day, per-cycle) for
+# every user and every registered score version in one streaming pass,
+# written with bulk inserts (COPY on Postgres). Snapshot rows always carry
+# window_end (the snapshot time for lifetime); live rows written by the
+# dashboard and the batch engines leave it NULL, so they never update a
+# snapshot in place.
+
+import csv
+import io
+import json
+import math
+from collections import defaultdict
+from datetime import datetime
+
+import pytz
+from sqlalchemy import select, insert, or_
+
+from services.history import parse_window
+from services.scoring import score_formulas, decay_half_life, decay_rate
+from utils.helpers import TESTING_MODE
+
+DEFAULT_WINDOWS = ("lifetime", "90d", "cycle")
+STREAM_BATCH = 5000   # rows fetched per round trip while streaming
+WRITE_BATCH = 5000    # DropCred rows per bulk insert
+
+_COPY_COLUMNS = (
+    "user_id", "total_likes", "total_dislikes", "total_possible", "drop_cred_score",
+    "computed_at", "score_version", "params", "window_label", "window_start", "window_end",
+)
+
+
+# --- Accumulation ------------------------------------------------------------
+def _stream_inputs(at: datetime, rolling: dict, user_ids=None, half_lives=()) -> tuple[dict, dict]:
+    """
+    One pass over submissions and one time-ordered pass over feedback.
+    Returns ({user_id: {window_label: [likes, ratings, cycles]}},
+             {user_id: {window_label: {half_life: [decayed_likes, decayed_ratings]}}})
+    for lifetime, each rolling window and each cycle_YYYY-MM-DD the user submitted to.
+    Decayed sums are only kept for the half-lives asked for (decayed versions).
+    """
+    from models import db, Submission, SongFeedback
+
+    acc = defaultdict(lambda: defaultdict(lambda: [0, 0, 0]))
+    decayed = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: [0.0, 0.0])))
+    rates = {hl: decay_rate(hl) for hl in half_lives}
+    day_cut = {label: start.date() for label, start in rolling.items()}
+    time_cut = dict(rolling)
+
+    # submissions -> distinct cycles per window
+    sub_q = select(Submission.user_id, Submission.cycle_date).distinct()
+    if user_ids is not None:
+        sub_q = sub_q.where(Submission.user_id.in_(user_ids))
+    for uid, cycle_date in db.session.execute(sub_q.execution_options(yield_per=STREAM_BATCH)):
+        if cycle_date > at.date():
+            continue
+        windows = acc[uid]
+        windows["lifetime"][2] += 1
+        windows[f"cycle_{cycle_date.isoformat()}"][2] = 1
+        for label, cut in day_cut.items():
+            if cycle_date >= cut:
+                windows[label][2] += 1
+
+    # feedback in time order -> likes/ratings per window
+    fb_q = (
+        select(Submission.user_id, SongFeedback.feedback, SongFeedback.timestamp, Submission.cycle_date)
+        .join(Submission, SongFeedback.song_id == Submission.id)
+        .order_by(SongFeedback.timestamp, SongFeedback.id)
+    )
+    if user_ids is not None:
+        fb_q = fb_q.where(Submission.user_id.in_(user_ids))
+    fb_q = fb_q.where(or_(SongFeedback.timestamp <= at, SongFeedback.timestamp.is_(None)))
+    for uid, value, ts, cycle_date in db.session.execute(fb_q.execution_options(yield_per=STREAM_BATCH)):
+        if ts is not None and ts.tzinfo is not None:
+            ts = ts.astimezone(pytz.UTC).replace(tzinfo=None)
+        like = int(value == "like")
+        windows = acc[uid]
+        labels = ["lifetime", f"cycle_{cycle_date.isoformat()}"] + [
+            label for label, cut in time_cut.items() if ts is not None and ts >= cut
+        ]
+        for label in labels:
+            counts = windows[label]
+            counts[0] += like
+            counts[1] += 1
+
+        if rates and ts is not None:
+            age = max((at - ts).total_seconds(), 0)
+            for hl, rate in rates.items():
+                w = math.exp(-rate * age)
+                for label in labels:
+                    sums = decayed[uid][label][hl]
+                    sums[0] += w * like
+                    sums[1] += w
+
+    return acc, decayed
+
+
+# --- Row building ------------------------------------------------------------
+def _aware_utc(ts):
+    # timestamptz columns: write aware UTC like models.utcnow()
+    if ts is None:
+        return None
+    return pytz.UTC.localize(ts) if ts.tzinfo is None else ts.astimezone(pytz.UTC)
+
+
+def _snapshot_rows(acc: dict, decayed: dict, at: datetime, versions, windows) -> list[dict]:
+    want_cycles = "cycle" in windows
+    rows = []
+    for uid, per_window in acc.items():
+        for label, (likes, ratings, cycles) in per_window.items():
+            is_cycle = label.startswith("cycle_")
+            if (is_cycle and not want_cycles) or (not is_cycle and label not in windows):
+                continue
+            _, start, end = parse_window(label, at)
+            for version in versions:
+                formula, params = score_formulas[version]
+                half_life = decay_half_life(version)
+                if half_life is None:
+                    score = formula(likes, ratings, cycles, **params)
+                    extra = {}
+                else:
+                    d_likes, d_ratings = decayed[uid][label][half_life]
+                    score = formula(d_likes, d_ratings, cycles, **params)
+                    extra = {"decayed_likes": round(d_likes, 4), "decayed_ratings": round(d_ratings, 4)}
+                rows.append({
+                    "user_id": uid,
+                    "total_likes": likes,
+                    "total_dislikes": max(ratings - likes, 0),
+                    "total_possible": ratings,
+                    "drop_cred_score": float(score),
+                    "computed_at": _aware_utc(at),
+                    "score_version": version,
+                    "params": {**params, "cycles": cycles, **extra},
+                    "window_label": label,
+                    "window_start": _aware_utc(start),
+                    "window_end": _aware_utc(end),
+                })
+    return rows
+
+
+# --- Writing -----------------------------------------------------------------
+def _copy_rows(rows: list[dict]) -> None:
+    # Postgres fast path: COPY ... FROM STDIN on the session's own connection
+    from models import db
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[c]) if c == "params" else ("" if row[c] is None else row[c])
+            for c in _COPY_COLUMNS
+        ])
+    buf.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY drop_creds ({', '.join(_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+    finally:
+        cursor.close()
+
+
+def write_snapshot_rows(rows: list[dict]) -> None:
+    """Bulk-write DropCred rows in WRITE_BATCH chunks (COPY on Postgres). Does not commit."""
+    from models import db, DropCred
+
+    use_copy = db.session.get_bind().dialect.name == "postgresql"
+    for i in range(0, len(rows), WRITE_BATCH):
+        chunk = rows[i:i + WRITE_BATCH]
+        if use_copy:
+            _copy_rows(chunk)
+        else:
+            db.session.execute(insert(DropCred).execution_options(render_nulls=True), chunk)
+
+
+def _delete_existing(at: datetime, versions, windows, user_ids=None) -> None:
+    # clear the snapshot rows we're about to rewrite (same snapshot time, versions + window kinds);
+    # earlier snapshots and the dashboard's live row are history and stay
+    from models import DropCred
+
+    label_filters = [DropCred.window_label.in_([w for w in windows if w != "cycle"])]
+    if "lifetime" in windows:
+        label_filters.append(DropCred.window_label.is_(None))
+    if "cycle" in windows:
+        label_filters.append(DropCred.window_label.like("cycle\\_%", escape="\\"))
+
+    q = (DropCred.query
+         .filter(DropCred.computed_at == _aware_utc(at))
+         .filter(DropCred.window_end.isnot(None))   # snapshot rows only, never the live row
+         .filter(DropCred.score_version.in_(list(versions)))
+         .filter(DropCred.circle_id.is_(None))   # per-circle rows belong to services/circle_scoring.py
+         .filter(or_(*label_filters)))
+    if user_ids is not None:
+        q = q.filter(DropCred.user_id.in_(user_ids))
+    q.delete(synchronize_session=False)
+
+
+# --- Entry point -------------------------------------------------------------
+def rebuild_drop_cred_history(versions=None, windows=DEFAULT_WINDOWS, at: datetime | None = None,
+                              user_ids=None, replace: bool = True, commit: bool = True) -> int:
+    """
+    Recompute windowed DropCred snapshots as of `at` (default: now, UTC) for
+    every user (or just `user_ids`) and every version in `versions`
+    (default: all of score_formulas; unregistered versions are skipped).
+
+    windows: "lifetime", rolling "<N>d" labels, and/or "cycle" (one row per
+    cycle the user submitted to). replace=True first deletes matching rows
+    of a snapshot already taken at `at` (re-running the same snapshot). Returns the number of rows written.
+    """
+    from models import db
+
+    at = at or datetime.utcnow()
+    requested = list(versions) if versions is not None else sorted(score_formulas)
+    versions = [v for v in requested if v in score_formulas]
+    if TESTING_MODE and len(versions) != len(requested):
+        print(f"[SNAPSHOT] skipping unregistered versions: {sorted(set(requested) - set(versions))}")
+    if not versions:
+        return 0
+
+    rolling = {}
+    for w in windows:
+        if w not in ("lifetime", "cycle"):
+            label, start, _ = parse_window(w, at)
+            rolling[label] = start
+
+    half_lives = {decay_half_life(v) for v in versions} - {None}
+    acc, decayed = _stream_inputs(at, rolling, user_ids=user_ids, half_lives=half_lives)
+    rows = _snapshot_rows(acc, decayed, at, versions, windows)
+
+    if replace:
+        _delete_existing(at, versions, windows, user_ids=user_ids)
+    write_snapshot_rows(rows)
+    if commit:
+        db.session.commit()
+
+    if TESTING_MODE:
+        print(f"[SNAPSHOT] wrote {len(rows)} DropCred rows for {len(acc)} user(s), versions={versions}")
+    return len(rows)
@@ -0,0 +1,178 @@
+# services/tokens.py
+#
+# Spotify access tokens, kept on the users row. Tokens are refreshed a few
+# minutes before expiry, concurrent refreshes for one user collapse into a
+# single Spotify call, and the result is written to users.access_token /
+# expires_at so background jobs can act on a user's behalf.
+#
+#   token = get_access_token(user_id)          # any app context (routes, CLI, jobs)
+#   refresh_session_token(session['user'])     # routes: sync the Flask session copy
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytz
+from flask import current_app, session
+from sqlalchemy.orm import Session
+
+from utils.helpers import TESTING_MODE
+from utils.spotify_auth import get_sp_oauth
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+REFRESH_MARGIN = timedelta(minutes=5)        # refresh this long before expires_at
+JOB_REFRESH_WINDOW = timedelta(minutes=15)   # `flask refresh-spotify-tokens` covers this far ahead
+
+# single-flight inside a process: striped locks keyed by user_id (bounded, no per-user growth);
+# across processes the users row lock (SELECT ... FOR UPDATE on Postgres) does the same job
+_LOCK_STRIPES = 64
+_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+# background refreshes started from request paths
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="token-refresh")
+_inflight = set()
+_inflight_lock = threading.Lock()
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _naive_utc(ts):
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(pytz.UTC).replace(tzinfo=None)
+
+
+def _fresh(access_token, expires_at, margin: timedelta, now: datetime) -> bool:
+    expires_at = _naive_utc(expires_at)
+    return bool(access_token) and expires_at is not None and expires_at - margin > now
+
+
+# --- Refresh (single-flight) -------------------------------------------------
+def refresh_user_token(user_id: int, margin: timedelta = REFRESH_MARGIN, force: bool = False) -> dict | None:
+    """
+    Refresh one user's token unless it is still good for `margin`, and
+    persist it. Concurrent callers for the same user wait for the first one
+    and then see its result instead of refreshing again.
+    Runs in its own short transaction (never commits or rolls back the
+    caller's session). Returns {"access_token", "expires_at"}, or None if
+    the user is missing or has no refresh token.
+    """
+    from models import db, User
+
+    with _locks[user_id % _LOCK_STRIPES], Session(db.engine) as s:
+        # re-read under a row lock: another worker/process may have refreshed already
+        user = s.query(User).filter(User.id == user_id).with_for_update().one_or_none()
+        if user is None:
+            return None
+        if not force and _fresh(user.access_token, user.expires_at, margin, _now()):
+            return {"access_token": user.access_token, "expires_at": _naive_utc(user.expires_at)}
+        if not user.refresh_token:
+            return None
+
+        refreshed = get_sp_oauth().refresh_access_token(user.refresh_token)
+
+        user.access_token = refreshed["access_token"]
+        if refreshed.get("refresh_token"):
+            user.refresh_token = refreshed["refresh_token"]   # Spotify may rotate it
+        user.expires_at = _now() + timedelta(seconds=int(refreshed.get("expires_in", 3600)))
+        result = {"access_token": user.access_token, "expires_at": user.expires_at}
+        s.commit()
+
+    if TESTING_MODE:
+        print(f"[TOKENS] refreshed user_id={user_id}, expires_at={result['expires_at']:%H:%M:%S}")
+    return result
+
+
+def _refresh_in_background(app, user_id: int) -> None:
+    with _inflight_lock:
+        if user_id in _inflight:
+            return
+        _inflight.add(user_id)
+
+    def _run():
+        try:
+            with app.app_context():
+                refresh_user_token(user_id)
+        except Exception as e:
+            app.logger.warning("Background token refresh failed for user_id=%s: %s", user_id, e)
+        finally:
+            with _inflight_lock:
+                _inflight.discard(user_id)
+
+    _refresh_pool.submit(_run)
+
+
+# --- Read paths --------------------------------------------------------------
+def get_access_token(user_id: int, margin: timedelta = REFRESH_MARGIN, block: bool = True) -> str | None:
+    """
+    A usable access token for the user, read from the users row. Inside the
+    refresh margin a still-valid token is returned as-is and (block=False)
+    refreshed in the background; only an expired token makes the caller wait.
+    """
+    from models import db, User
+
+    row = db.session.query(User.access_token, User.expires_at).filter(User.id == user_id).one_or_none()
+    if row is None:
+        return None
+
+    now = _now()
+    if _fresh(row.access_token, row.expires_at, margin, now):
+        return row.access_token
+
+    if not block and _fresh(row.access_token, row.expires_at, timedelta(0), now):
+        _refresh_in_background(current_app._get_current_object(), user_id)
+        return row.access_token
+
+    token = refresh_user_token(user_id, margin)
+    return token["access_token"] if token else None
+
+
+def refresh_session_token(session_user: dict) -> str | None:
+    """
+    Route helper: make sure the logged-in user's token is usable and copy the
+    (possibly refreshed) token from the users row into the Flask session.
+    """
+    from models import db, User
+
+    user_id = (db.session.query(User.id)
+               .filter(User.spotify_id == session_user.get("spotify_id"))
+               .scalar())
+    if user_id is None:
+        return session_user.get("access_token")
+
+    token = get_access_token(user_id, block=False)
+    if token and token != session_user.get("access_token"):
+        expires_at = db.session.query(User.expires_at).filter(User.id == user_id).scalar()
+        session["user"]["access_token"] = token
+        if expires_at:
+            session["user"]["expires_at"] = int(pytz.UTC.localize(_naive_utc(expires_at)).timestamp())
+        session.modified = True
+    return token
+
+
+# --- Batch job ---------------------------------------------------------------
+def refresh_expiring_tokens(window: timedelta = JOB_REFRESH_WINDOW) -> tuple[int, int]:
+    """
+    Refresh every token expiring within `window` (cron / CLI), so request
+    paths find fresh tokens already in the users table.
+    Returns (refreshed, failed).
+    """
+    from models import db, User
+
+    cutoff = _now() + window
+    user_ids = [
+        uid for (uid,) in db.session.query(User.id)
+        .filter(User.refresh_token.isnot(None))
+        .filter((User.expires_at.is_(None)) | (User.expires_at <= cutoff))
+    ]
+    refreshed = failed = 0
+    for uid in user_ids:
+        try:
+            if refresh_user_token(uid, margin=window) is not None:
+                refreshed += 1
+        except Exception as e:
+            failed += 1
+            current_app.logger.warning("Token refresh failed for user_id=%s: %s", uid, e)
+    return refreshed, failed
@@ -0,0 +1,187 @@
+# services/tracks.py
+#
+# Spotify track metadata backed by the `tracks` table. Submitting a song
+# stores its metadata once; pages read names from the database and only
+# go to Spotify for tracks they have never seen.
+
+from sqlalchemy.exc import IntegrityError
+from spotipy.exceptions import SpotifyException
+
+from utils.cache import LRUCache
+from utils.helpers import TESTING_MODE
+# ⛔️ Models are imported lazily (same reason as services/scoring.py).
+
+UNKNOWN_TRACK = {"name": "Unknown Vibe", "artist": "Unknown Artist", "album_art_url": None}
+TRACKS_PER_CALL = 50   # Spotify's limit for GET /v1/tracks?ids=
+
+# --- Per-worker metadata cache -----------------------------------------------
+# spotify_track_id -> {"name", "artist", "album_art_url"}, in front of the
+# tracks table and Spotify. Metadata barely changes; the TTL only bounds how
+# long a corrected row (re-fetched / backfilled) can stay stale per worker.
+TRACK_CACHE_SIZE = 20000
+TRACK_CACHE_TTL = 6 * 3600
+
+_track_cache = LRUCache(maxsize=TRACK_CACHE_SIZE, ttl=TRACK_CACHE_TTL)
+
+
+def track_cache_stats() -> dict:
+    return _track_cache.stats()
+
+
+# --- Spotify payload -> row --------------------------------------------------
+def track_row(track: dict) -> dict:
+    """Columns for a `tracks` row from a Spotify track object."""
+    artists = track.get("artists") or []
+    images = (track.get("album") or {}).get("images") or []
+    return {
+        "spotify_track_id": track["id"],
+        "name": track.get("name") or UNKNOWN_TRACK["name"],
+        "artist": artists[0].get("name") if artists else None,
+        "album_art_url": images[0].get("url") if images else None,   # Spotify lists the largest first
+        "duration_ms": track.get("duration_ms"),
+    }
+
+
+def _meta(name, artist, album_art_url) -> dict:
+    return {"name": name, "artist": artist or UNKNOWN_TRACK["artist"], "album_art_url": album_art_url}
+
+
+# --- Batched Spotify lookup --------------------------------------------------
+def _fetch_one(sp, track_id: str):
+    try:
+        return sp.track(track_id)
+    except Exception:
+        return None
+
+
+def resolve_tracks(sp, track_ids) -> dict:
+    """
+    {track_id: Spotify track object, or None if it couldn't be resolved},
+    fetched with sp.tracks() in chunks of TRACKS_PER_CALL (40 songs = 1 call).
+    Spotify answers null for unknown ids; a 400 (one malformed id poisons the
+    whole batch) retries that chunk one id at a time, any other failure leaves
+    the chunk unresolved for this request.
+    """
+    ids = list(dict.fromkeys(tid for tid in track_ids if tid))
+    resolved = {}
+    for i in range(0, len(ids), TRACKS_PER_CALL):
+        chunk = ids[i:i + TRACKS_PER_CALL]
+        try:
+            found = (sp.tracks(chunk) or {}).get("tracks") or []
+        except SpotifyException as e:
+            if e.http_status == 400:
+                resolved.update({tid: _fetch_one(sp, tid) for tid in chunk})
+                continue
+            found = []
+        except Exception:
+            found = []
+        # results come back in request order; match by position, not by id (relinked tracks)
+        for tid, track in zip(chunk, found):
+            resolved[tid] = track
+        for tid in chunk:
+            resolved.setdefault(tid, None)
+    return resolved
+
+
+# --- Persistence -------------------------------------------------------------
+def store_tracks(tracks: dict) -> None:
+    """
+    Upsert {requested track_id: Spotify track object} into `tracks` (None
+    values are skipped). A concurrent insert of the same id (two members
+    submitting the same song) is ignored. Does not commit.
+    """
+    from models import db, Track, utcnow
+
+    for track_id, track in tracks.items():
+        if not track:
+            continue
+        row = {**track_row(track), "spotify_track_id": track_id}
+        try:
+            with db.session.begin_nested():
+                db.session.merge(Track(**row, fetched_at=utcnow()))
+        except IntegrityError:
+            pass
+
+
+def remember_track(sp, spotify_track_id: str) -> None:
+    """
+    Fetch and store one track's metadata (submit time). A Spotify failure is
+    not fatal: the dashboard fills the row in later. Does not commit.
+    """
+    from models import db, Track
+
+    if _track_cache.get(spotify_track_id) is not None or db.session.get(Track, spotify_track_id) is not None:
+        return
+    track = _fetch_one(sp, spotify_track_id)
+    if track is None and TESTING_MODE:
+        print(f"[TRACKS] could not fetch {spotify_track_id}")
+    store_tracks({spotify_track_id: track})
+
+
+# --- Read path ---------------------------------------------------------------
+def get_track_meta(sp, track_ids) -> dict:
+    """
+    {spotify_track_id: {"name", "artist", "album_art_url"}} for every id.
+    Lookup order: this worker's cache, then one SELECT on the tracks table,
+    then batched Spotify calls (resolve_tracks) whose results are stored (and
+    committed) so the next view finds them. Ids Spotify can't resolve map to
+    UNKNOWN_TRACK and are not cached, so they are retried next time.
+    """
+    from models import db, Track
+
+    ids = list(dict.fromkeys(tid for tid in track_ids if tid))
+    if not ids:
+        return {}
+
+    meta = {}
+    for tid in ids:
+        cached = _track_cache.get(tid)
+        if cached is not None:
+            meta[tid] = cached
+
+    uncached = [tid for tid in ids if tid not in meta]
+    if uncached:
+        for tid, name, artist, art in db.session.query(
+            Track.spotify_track_id, Track.name, Track.artist, Track.album_art_url
+        ).filter(Track.spotify_track_id.in_(uncached)):
+            meta[tid] = _meta(name, artist, art)
+            _track_cache.set(tid, meta[tid])
+
+    missing = [tid for tid in ids if tid not in meta]
+    if missing:
+        fetched = {tid: track for tid, track in resolve_tracks(sp, missing).items() if track}
+        store_tracks(fetched)
+        db.session.commit()
+        for tid, track in fetched.items():
+            row = track_row(track)
+            meta[tid] = _meta(row["name"], row["artist"], row["album_art_url"])
+            _track_cache.set(tid, meta[tid])
+        if TESTING_MODE:
+            print(f"[TRACKS] {len(ids) - len(uncached)} cached, {len(uncached) - len(missing)} from db, "
+                  f"fetched {len(fetched)}/{len(missing)} from Spotify")
+
+    return {tid: meta.get(tid, dict(UNKNOWN_TRACK)) for tid in ids}
+
+
+# --- Backfill ----------------------------------------------------------------
+def backfill_tracks(sp, batch_size: int = 500) -> tuple[int, int]:
+    """
+    Resolve every submitted track id missing from `tracks`, batch_size ids
+    per commit. Returns (stored, unresolved).
+    """
+    from models import db, Track, Submission
+
+    missing = [
+        tid for (tid,) in (
+            db.session.query(Submission.spotify_track_id).distinct()
+            .outerjoin(Track, Track.spotify_track_id == Submission.spotify_track_id)
+            .filter(Track.spotify_track_id.is_(None))
+        )
+    ]
+    stored = 0
+    for i in range(0, len(missing), batch_size):
+        fetched = {tid: t for tid, t in resolve_tracks(sp, missing[i:i + batch_size]).items() if t}
+        store_tracks(fetched)
+        db.session.commit()
+        stored += len(fetched)
+    return stored, len(missing) - stored
@@ -0,0 +1,77 @@
+# utils/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+
+# --- Bounded in-process LRU cache --------------------------------------------
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU map (one per process / gunicorn worker).
+    With ttl (seconds) set, entries also expire that long after being set.
+    Keeps hit/miss/eviction/expiry counters so it can be sized from real traffic.
+    """
+
+    _MISSING = (object(), None)
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (value, monotonic deadline or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+            value, deadline = entry
+            if deadline is not None and time.monotonic() >= deadline:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        deadline = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, self._MISSING)
+            return default if entry is self._MISSING else entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "ttl": self.ttl,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -13,13 +13,17 @@ def get_current_cycle_date(circle):
     Computes the key date for the current drop cycle.
     Logic depends on circle's drop frequency (daily/weekly/biweekly).
     Inputs:
-        - circle (SoundCircle): includes frequency metadata (not yet modeled)
+        - circle (SoundCircle): drop_frequency, drop_day1/2, drop_time
     Outputs:
-        - A date object representing the current drop window
+        - A date object representing the current drop window: the (UTC) date
+          of the drop that opened it, same as Submission.cycle_date
     """
-    # TODO: Replace with dynamic logic once drop frequency is modeled
-    today = datetime.now().date()
-    return today  # Default to daily cycle for now
+    from services.schedule import get_cycle_window   # services import this module
+
+    window = get_cycle_window(circle)
+    if window is None:
+        return datetime.utcnow().date()  # incomplete schedule: fall back to a daily cycle
+    return window[1].date()
 
 
 # Additional helper candidates (for future refactor):
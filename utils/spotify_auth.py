@@ -5,8 +5,10 @@ from dotenv import load_dotenv
 # import time
 from datetime import datetime, timedelta
 import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from flask import session
+from spotipy.oauth2 import SpotifyOAuth, SpotifyClientCredentials
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.spotify_scheduler import ScheduledSpotify, BACKGROUND
 
 # Load env variables from .env
 load_dotenv()
@@ -22,7 +24,55 @@ CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 REDIRECT_URI = os.getenv("SPOTIFY_REDIRECT_URI")
 
 # What permissions we request from the user
-SCOPE = "user-read-private playlist-modify-public playlist-modify-private playlist-read-private"
+SCOPE = "user-read-private playlist-modify-public playlist-modify-private playlist-read-private playlist-read-collaborative"
+
+# --- Pooled HTTP session (one per process) -----------------------------------
+# Keep-alive connections to accounts.spotify.com / api.spotify.com shared by every
+# auth path and spotipy client, so a login burst doesn't pay a TCP+TLS handshake per call.
+HTTP_TIMEOUT = (3.05, 10)   # (connect, read) seconds
+
+def _build_http_session():
+    retry = Retry(
+        total=3,
+        connect=3,                                  # connect errors: request never sent, safe for POST too
+        read=0,
+        status=2,
+        status_forcelist=(500, 502, 503, 504),      # transient 5xx, only for idempotent methods
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        backoff_factor=0.3,
+        respect_retry_after_header=False,           # 429s surface to utils/spotify_scheduler, which owns Retry-After
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    return s
+
+http = _build_http_session()
+
+_sp_oauth = None
+
+def get_sp_oauth():
+    """One SpotifyOAuth per process, sharing the pooled session."""
+    global _sp_oauth
+    if _sp_oauth is None:
+        _sp_oauth = SpotifyOAuth(
+            client_id=CLIENT_ID,
+            client_secret=CLIENT_SECRET,
+            redirect_uri=REDIRECT_URI,
+            scope=SCOPE,
+            requests_session=http,
+            requests_timeout=HTTP_TIMEOUT,
+            cache_handler=spotipy.cache_handler.MemoryCacheHandler(),   # tokens live in the session/DB, never a .cache file
+            open_browser=False,
+        )
+    return _sp_oauth
+
+# spotipy client for a user's access token, on the pooled session; calls go through the rate-limit scheduler
+def spotify_client(access_token, priority=None):
+    sp = spotipy.Spotify(auth=access_token, requests_session=http, requests_timeout=HTTP_TIMEOUT,
+                         retries=0, status_retries=0)
+    return ScheduledSpotify(sp, priority)
 
 def get_auth_url():
     params = {
@@ -33,6 +83,14 @@ def get_auth_url():
     }
     return f"{SPOTIFY_AUTH_URL}?{urllib.parse.urlencode(params)}"
 
+# app-only client (client-credentials flow) for catalog reads outside a user request, e.g. CLI backfills
+def get_app_client(priority=BACKGROUND):
+    auth = SpotifyClientCredentials(client_id=CLIENT_ID, client_secret=CLIENT_SECRET,
+                                    requests_session=http, requests_timeout=HTTP_TIMEOUT)
+    sp = spotipy.Spotify(auth_manager=auth, requests_session=http, requests_timeout=HTTP_TIMEOUT,
+                         retries=0, status_retries=0)
+    return ScheduledSpotify(sp, priority)
+
 def get_token(code):
     data = {
         "grant_type": "authorization_code",
@@ -41,7 +99,7 @@ def get_token(code):
         "client_id": CLIENT_ID,
         "client_secret": CLIENT_SECRET,
     }
-    response = requests.post(SPOTIFY_TOKEN_URL, data=data)
+    response = http.post(SPOTIFY_TOKEN_URL, data=data, timeout=HTTP_TIMEOUT)
     token_data = response.json()
     
     # Add expires_at (UTC timestamp for when the token expires)
@@ -52,7 +110,7 @@ def get_token(code):
 
 def get_user_profile(access_token):
     headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(SPOTIFY_USER_PROFILE_URL, headers=headers)
+    response = http.get(SPOTIFY_USER_PROFILE_URL, headers=headers, timeout=HTTP_TIMEOUT)
     
     # NEW: handle failure gracefully
     if response.status_code != 200:
@@ -62,36 +120,3 @@ def get_user_profile(access_token):
         return None
     
     return response.json()
-
-def refresh_token_if_needed(session_user):
-    expires_at = session_user.get('expires_at')
-    
-    # Convert to UNIX timestamp if it's a datetime object
-    if isinstance(expires_at, datetime):
-        expires_at = int(expires_at.timestamp())
-
-    # Skip refresh if still valid
-    now = int(datetime.utcnow().timestamp())
-    if now < expires_at:
-        return
-    print("⚠️ Token expired — refreshing...")
-    
-    token_info = {
-        'access_token': session_user['access_token'],
-        'refresh_token': session_user['refresh_token'],
-        'expires_at': expires_at
-    }
-
-    sp_oauth = SpotifyOAuth(
-        client_id=os.getenv("SPOTIFY_CLIENT_ID"),
-        client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
-        redirect_uri=os.getenv("SPOTIFY_REDIRECT_URI"),
-        scope=SCOPE
-    )
-
-    refreshed = sp_oauth.refresh_access_token(token_info['refresh_token'])
-    session['user']['access_token'] = refreshed['access_token']
-    session['user']['expires_at'] = refreshed['expires_at']
-    session.modified = True
-
-    print("[DEBUG] Access token refreshed! New token:", refreshed['access_token'])
\ No newline at end of file
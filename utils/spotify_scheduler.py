@@ -0,0 +1,224 @@
+# utils/spotify_scheduler.py
+#
+# Central gate for outbound Spotify Web API calls (one per process).
+#   - token bucket: SPOTIFY_RATE calls/s sustained, SPOTIFY_BURST at once
+#   - 429: the Retry-After pause applies to every caller in the process, not
+#     just the one that got it, so we stop hammering while limited
+#   - retries with jittered exponential backoff on 429, and on transient 5xx
+#     for reads only: a write that 5xx'd may still have landed, so repeating
+#     it could add tracks twice or create a second playlist
+#   - priority classes: waiting INTERACTIVE calls (page loads) always go
+#     before BACKGROUND ones (backfills, playlist jobs)
+#
+#   sched = get_scheduler()
+#   sched.call(sp.playlist, playlist_id)                                 # sync, spotipy read
+#   sched.call(sp.playlist_add_items, playlist_id, uris, idempotent=False)   # write: 429 only
+#   with sched.priority(BACKGROUND): ...                                 # default for a block
+#
+# spotipy clients must not retry on their own (utils/spotify_auth builds them
+# on a session without 429 retries) so the scheduler sees every 429.
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+from spotipy.exceptions import SpotifyException
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+SPOTIFY_RATE = float(os.getenv("SPOTIFY_RATE", "10"))      # calls / second / process
+SPOTIFY_BURST = int(os.getenv("SPOTIFY_BURST", "20"))
+MAX_WAIT = {INTERACTIVE: 10.0, BACKGROUND: 300.0}           # seconds a call may queue before giving up
+MAX_RETRIES = {INTERACTIVE: 2, BACKGROUND: 5}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# spotipy methods that only read; anything else is treated as a write (429-only retries)
+READ_METHODS = frozenset({
+    "me", "current_user", "user", "current_user_playlists", "user_playlists", "next", "previous",
+    "playlist", "playlist_items", "playlist_tracks", "playlist_is_following", "playlist_cover_image",
+    "track", "tracks", "artist", "artists", "album", "albums", "album_tracks", "audio_features",
+    "search", "current_user_saved_tracks", "current_user_top_tracks", "current_user_top_artists",
+    "current_user_recently_played",
+})
+
+current_priority = contextvars.ContextVar("spotify_priority", default=INTERACTIVE)
+
+
+class RateLimited(Exception):
+    """Spotify (or our own budget) says wait; retry_after is in seconds."""
+
+    def __init__(self, retry_after: float, message: str = "Spotify rate limit reached"):
+        super().__init__(f"{message}; retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def retry_after_of(exc) -> float | None:
+    """Retry-After seconds from a spotipy 429 (or anything carrying retry_after), else None."""
+    if getattr(exc, "retry_after", None) is not None:
+        return float(exc.retry_after)
+    if isinstance(exc, SpotifyException) and exc.http_status == 429:
+        headers = exc.headers or {}
+        try:
+            return float(headers.get("Retry-After") or headers.get("retry-after") or 1)
+        except (TypeError, ValueError):
+            return 1.0
+    return None
+
+
+def status_of(exc) -> int | None:
+    if isinstance(exc, SpotifyException):
+        return exc.http_status
+    return getattr(exc, "status", None)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+# --- Scheduler ---------------------------------------------------------------
+class SpotifyScheduler:
+    def __init__(self, rate: float = SPOTIFY_RATE, burst: int = SPOTIFY_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0              # shared Retry-After pause
+        self._cond = threading.Condition()
+        self._waiting = []                     # heap of (priority, seq)
+        self._seq = itertools.count()
+        self.stats = {"calls": 0, "throttled_429": 0, "retries": 0, "gave_up": 0, "waited_s": 0.0}
+
+    # token bucket, caller holds the condition lock
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self, priority: int | None = None, max_wait: float | None = None) -> None:
+        """Block until this call may go out; higher priority waiters first."""
+        priority = current_priority.get() if priority is None else priority
+        max_wait = MAX_WAIT.get(priority, MAX_WAIT[BACKGROUND]) if max_wait is None else max_wait
+        start = time.monotonic()
+        deadline = start + max_wait
+
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiting[0] == ticket and now >= self._blocked_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        self.stats["calls"] += 1
+                        self.stats["waited_s"] += now - start
+                        return
+                    ready_at = max(self._blocked_until, now + (1 - self._tokens) / self.rate)
+                    if ready_at > deadline:
+                        self.stats["gave_up"] += 1
+                        raise RateLimited(max(ready_at - now, 1.0))
+                    self._cond.wait(timeout=max(ready_at - now, 0.005))
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Apply a Retry-After to every caller in this process."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.stats["throttled_429"] += 1
+            self._cond.notify_all()
+
+    def call(self, fn, *args, priority: int | None = None, idempotent: bool = True, **kwargs):
+        """
+        Run fn(*args, **kwargs) under the budget, retrying 429 (and 5xx when
+        idempotent) with jittered backoff. Pass idempotent=False for writes.
+        Raises RateLimited once retries are used up on 429s.
+        """
+        priority = current_priority.get() if priority is None else priority
+        retries = MAX_RETRIES.get(priority, MAX_RETRIES[BACKGROUND])
+        for attempt in range(retries + 1):
+            self.acquire(priority)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                status = status_of(e)
+                if status not in RETRY_STATUSES or (status != 429 and not idempotent):
+                    raise
+                wait = retry_after_of(e)
+                if wait is not None:
+                    self.pause(wait)
+                if attempt == retries:
+                    if status == 429:
+                        raise RateLimited(wait or 1.0) from e
+                    raise
+                self.stats["retries"] += 1
+                # the shared pause already covers Retry-After; jitter spreads the wake-ups
+                time.sleep(backoff_delay(attempt) if wait is None else random.uniform(0, BACKOFF_BASE))
+
+    @contextlib.contextmanager
+    def priority(self, priority: int):
+        token = current_priority.set(priority)
+        try:
+            yield
+        finally:
+            current_priority.reset(token)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                **self.stats,
+                "waited_s": round(self.stats["waited_s"], 3),
+                "tokens": round(self._tokens, 2),
+                "paused_for_s": round(max(self._blocked_until - now, 0.0), 2),
+                "queued": len(self._waiting),
+                "rate": self.rate,
+                "burst": self.burst,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> SpotifyScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = SpotifyScheduler()
+    return _scheduler
+
+
+# --- spotipy wrapper ---------------------------------------------------------
+class ScheduledSpotify:
+    """
+    spotipy.Spotify proxy: every public method call goes through the
+    scheduler; methods outside READ_METHODS are called as writes.
+    """
+
+    def __init__(self, client, priority: int | None = None):   # None -> current_priority
+        self._client = client
+        self._priority = priority
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def scheduled(*args, **kwargs):
+            return get_scheduler().call(attr, *args, priority=self._priority,
+                                        idempotent=name in READ_METHODS, **kwargs)
+
+        return scheduled